@@ -0,0 +1,91 @@
+# backend/benchmarks/bench_bulk_write.py
+"""Rows/sec for DocEmbedding + DocProjection writes: per-row create vs bulk_create vs COPY.
+
+Needs a Postgres with pgvector (DATABASE_URL). Everything runs inside a
+transaction that is rolled back, so the database is left untouched.
+
+    cd backend && python -m benchmarks.bench_bulk_write --sizes 1000 10000 100000
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import time
+
+import django
+
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "config.settings")
+django.setup()
+
+import numpy as np  # noqa: E402
+from django.conf import settings  # noqa: E402
+from django.db import transaction  # noqa: E402
+
+from core.bulk import write_embeddings, write_projections  # noqa: E402
+from core.models import AnalysisRun, Document, DocEmbedding, DocProjection  # noqa: E402
+
+COHORT = "__bench_bulk_write__"
+
+
+def _per_row(run_id, section, doc_ids, V, coords, labels, outlier):
+    for d, vec in zip(doc_ids, V):
+        DocEmbedding.objects.create(
+            document_id=d, run_id=run_id, section=section, vector=vec.tolist(),
+            norm=float(np.linalg.norm(vec)),
+        )
+    for d, (x, y), lab, sc in zip(doc_ids, coords, labels, outlier):
+        DocProjection.objects.create(
+            document_id=d, run_id=run_id, section=section, x=float(x), y=float(y),
+            cluster_id=int(lab), outlier_score=float(sc),
+        )
+
+
+def _bulk(run_id, section, doc_ids, V, coords, labels, outlier):
+    write_embeddings(run_id, section, doc_ids, V)
+    write_projections(run_id, section, doc_ids, coords, labels, outlier)
+
+
+def bench(n: int, mode: str) -> float:
+    rng = np.random.default_rng(0)
+    V = rng.standard_normal((n, 384), dtype=np.float32)
+    coords = rng.standard_normal((n, 2), dtype=np.float32)
+    labels = rng.integers(-1, 8, n)
+    outlier = rng.random(n, dtype=np.float32)
+
+    with transaction.atomic():
+        docs = Document.objects.bulk_create(
+            [Document(cohort_key=COHORT, filename=f"{i}.txt", file_path="") for i in range(n)],
+            batch_size=5000,
+        )
+        run = AnalysisRun.objects.create(cohort_key=COHORT)
+        doc_ids = [d.id for d in docs]
+
+        settings.BULK_WRITE_MODE = "copy" if mode == "copy" else "bulk_create"
+        write = _per_row if mode == "per_row" else _bulk
+        t0 = time.perf_counter()
+        write(run.id, "doc", doc_ids, V, coords, labels, outlier)
+        elapsed = time.perf_counter() - t0
+        transaction.set_rollback(True)
+
+    return 2 * n / elapsed  # one embedding + one projection row per document
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000, 100000])
+    ap.add_argument("--modes", nargs="+", default=["per_row", "bulk_create", "copy"])
+    ap.add_argument("--per-row-max", type=int, default=10000, help="skip per_row above this size")
+    args = ap.parse_args()
+
+    results = []
+    for n in args.sizes:
+        for mode in args.modes:
+            if mode == "per_row" and n > args.per_row_max:
+                continue
+            results.append({"documents": n, "mode": mode, "rows_per_sec": round(bench(n, mode), 1)})
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,74 @@
+# backend/benchmarks/bench_chunking.py
+"""Docs/sec for section chunking over a synthetic resume corpus.
+
+Compares the per-line `re.match` loop (run once per section, as run_analysis
+used to) against the precompiled single-pass chunker run once per document.
+
+    cd backend && python -m benchmarks.bench_chunking --n 100000
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import re
+import time
+from collections import defaultdict
+
+from core.chunking import HEADERS, chunk_sections
+from core.synthetic import synthetic_corpus
+
+SECTIONS_FOR_VIEWS = ["doc", "skills", "experience"]
+
+
+def legacy_chunk_sections(text: str) -> dict[str, str]:
+    lines = [ln.strip() for ln in text.splitlines()]
+    lines = [ln for ln in lines if ln]
+    current = "other"
+    out = defaultdict(list)
+    for ln in lines:
+        low = ln.lower()
+        matched = None
+        for section, pats in HEADERS.items():
+            for p in pats:
+                if re.match(p, low):
+                    matched = section
+                    break
+            if matched:
+                break
+        if matched:
+            current = matched
+            continue
+        out[current].append(ln)
+    out["doc"] = lines
+    return {k: "\n".join(v).strip() for k, v in out.items() if "\n".join(v).strip()}
+
+
+def timed(fn, corpus: list[str]) -> float:
+    t0 = time.perf_counter()
+    fn(corpus)
+    return time.perf_counter() - t0
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--n", type=int, default=100_000)
+    args = ap.parse_args()
+
+    corpus = synthetic_corpus(args.n)
+    mb = sum(len(t) for t in corpus) / 1e6
+
+    legacy_s = timed(lambda c: [legacy_chunk_sections(t) for t in c for _ in SECTIONS_FOR_VIEWS], corpus)
+    single_s = timed(lambda c: [chunk_sections(t) for t in c], corpus)
+    assert all(legacy_chunk_sections(t) == chunk_sections(t) for t in corpus[:1000])
+
+    print(json.dumps({
+        "documents": args.n,
+        "corpus_mb": round(mb, 1),
+        "legacy_per_section_docs_per_sec": round(args.n / legacy_s, 1),
+        "single_pass_docs_per_sec": round(args.n / single_s, 1),
+        "speedup": round(legacy_s / single_s, 2),
+    }, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,63 @@
+# backend/benchmarks/bench_embed.py
+"""Texts/sec for one-at-a-time encoding vs the batched embedding engine (CPU).
+
+    cd backend && python -m benchmarks.bench_embed --n 2000 --batch-size 64
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import random
+import time
+
+os.environ.setdefault("CUDA_VISIBLE_DEVICES", "")  # CPU numbers only
+
+from core.embed import embed_texts, get_model
+
+WORDS = (
+    "python sql data analysis pipeline dashboard research lab teaching assistant "
+    "machine learning statistics visualization led team built deployed improved "
+    "customer reporting automation cloud aws docker api frontend backend testing"
+).split()
+
+
+def synthetic_texts(n: int, seed: int = 0) -> list[str]:
+    rng = random.Random(seed)
+    return [" ".join(rng.choices(WORDS, k=rng.randint(10, 400))) for _ in range(n)]
+
+
+def texts_per_sec(model_name: str, texts: list[str], batch_size: int) -> float:
+    t0 = time.perf_counter()
+    embed_texts(model_name, texts, batch_size=batch_size)
+    return len(texts) / (time.perf_counter() - t0)
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--model", default="sentence-transformers/all-MiniLM-L6-v2")
+    ap.add_argument("--n", type=int, default=2000)
+    ap.add_argument("--batch-size", type=int, default=64)
+    args = ap.parse_args()
+
+    import torch
+    torch.set_grad_enabled(False)
+
+    texts = synthetic_texts(args.n)
+    get_model(args.model)  # exclude model load from both timings
+    embed_texts(args.model, texts[:8], batch_size=8)  # warm-up
+
+    single = texts_per_sec(args.model, texts, batch_size=1)
+    batched = texts_per_sec(args.model, texts, batch_size=args.batch_size)
+    print(json.dumps({
+        "model": args.model,
+        "n": args.n,
+        "device": "cpu",
+        "batch_size_1_texts_per_sec": round(single, 1),
+        f"batch_size_{args.batch_size}_texts_per_sec": round(batched, 1),
+        "speedup": round(batched / single, 2),
+    }, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+# backend/benchmarks/bench_neighbors.py
+"""Neighbour lookup latency (p50/p95/p99) at 10k and 100k embeddings, HNSW vs sequential scan.
+
+Needs a Postgres with pgvector (DATABASE_URL). Rows are inserted inside a
+transaction that is rolled back at the end.
+
+    cd backend && python -m benchmarks.bench_neighbors --sizes 10000 100000
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import time
+
+import django
+
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "config.settings")
+django.setup()
+
+import numpy as np  # noqa: E402
+from django.db import connection, transaction  # noqa: E402
+
+from core.bulk import write_embeddings  # noqa: E402
+from core.models import AnalysisRun, Document  # noqa: E402
+from core.neighbor import nearest_documents, nearest_documents_batch  # noqa: E402
+
+COHORT = "__bench_neighbors__"
+
+
+def percentiles(samples_s: list[float]) -> dict:
+    ms = np.asarray(samples_s) * 1000
+    return {f"p{p}_ms": round(float(np.percentile(ms, p)), 2) for p in (50, 95, 99)}
+
+
+def clustered_vectors(n: int, dim: int = 384, centers: int = 50, seed: int = 0) -> np.ndarray:
+    rng = np.random.default_rng(seed)
+    C = rng.standard_normal((centers, dim), dtype=np.float32)
+    return C[rng.integers(0, centers, n)] + 0.3 * rng.standard_normal((n, dim), dtype=np.float32)
+
+
+def bench(n: int, queries: int, batch: int, k: int) -> list[dict]:
+    rng = np.random.default_rng(1)
+    out = []
+    with transaction.atomic():
+        docs = Document.objects.bulk_create(
+            [Document(cohort_key=COHORT, filename=f"{i}.txt", file_path="") for i in range(n)],
+            batch_size=5000,
+        )
+        run = AnalysisRun.objects.create(cohort_key=COHORT)
+        doc_ids = [d.id for d in docs]
+        write_embeddings(run.id, "doc", doc_ids, clustered_vectors(n))
+        with connection.cursor() as cur:
+            cur.execute("ANALYZE core_docembedding")
+
+        for plan in ("hnsw", "seqscan"):
+            with connection.cursor() as cur:
+                cur.execute("SET LOCAL enable_indexscan = %s", ["off" if plan == "seqscan" else "on"])
+
+            samples = []
+            for d in rng.choice(doc_ids, size=queries, replace=False):
+                t0 = time.perf_counter()
+                nearest_documents(run.id, int(d), "doc", k)
+                samples.append(time.perf_counter() - t0)
+            out.append({"embeddings": n, "plan": plan, "query": "single", "k": k, **percentiles(samples)})
+
+            samples = []
+            for _ in range(max(1, queries // 10)):
+                ids = [int(x) for x in rng.choice(doc_ids, size=batch, replace=False)]
+                t0 = time.perf_counter()
+                nearest_documents_batch(run.id, ids, "doc", k)
+                samples.append(time.perf_counter() - t0)
+            out.append({"embeddings": n, "plan": plan, "query": f"batch_{batch}", "k": k, **percentiles(samples)})
+
+        transaction.set_rollback(True)
+    return out
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--sizes", type=int, nargs="+", default=[10000, 100000])
+    ap.add_argument("--queries", type=int, default=200)
+    ap.add_argument("--batch", type=int, default=50)
+    ap.add_argument("-k", type=int, default=5)
+    args = ap.parse_args()
+
+    results = []
+    for n in args.sizes:
+        results.extend(bench(n, args.queries, args.batch, args.k))
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
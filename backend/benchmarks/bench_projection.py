@@ -0,0 +1,64 @@
+# backend/benchmarks/bench_projection.py
+"""Projection engines compared on clustered synthetic vectors.
+
+Reports time and memory for each engine, plus a fidelity score.
+The score is trustworthiness (k=10) on a fixed sample, measured
+against the raw vectors.
+
+    cd backend && python -m benchmarks.bench_projection --n 30000
+"""
+from __future__ import annotations
+
+import argparse
+import json
+
+import numpy as np
+from sklearn.manifold import trustworthiness
+
+from core.profiling import measure
+from core.umap_project import PROJECTION_ENGINES, project_umap
+
+
+def clustered_vectors(n: int, dim: int = 384, clusters: int = 25, seed: int = 0) -> np.ndarray:
+    rng = np.random.default_rng(seed)
+    centers = rng.normal(size=(clusters, dim)).astype(np.float32)
+    V = centers[rng.integers(0, clusters, n)] + 0.6 * rng.normal(size=(n, dim)).astype(np.float32)
+    return V / np.linalg.norm(V, axis=1, keepdims=True)
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--n", type=int, default=30000)
+    ap.add_argument("--engines", default=",".join(PROJECTION_ENGINES))
+    ap.add_argument("--landmark-size", type=int, default=10000)
+    ap.add_argument("--pca-components", type=int, default=50)
+    ap.add_argument("--sample", type=int, default=2000)
+    args = ap.parse_args()
+
+    V = clustered_vectors(args.n)
+    sample = np.random.default_rng(1).choice(args.n, size=min(args.sample, args.n), replace=False)
+    project_umap(V[:500], {"random_state": 42})  # pay numba JIT compilation before timing anything
+    results = {"n": args.n, "engines": {}}
+    for engine in args.engines.split(","):
+        params = {
+            "engine": engine,
+            "n_neighbors": 15,
+            "min_dist": 0.1,
+            "metric": "cosine",
+            "random_state": 42,
+            "landmark_size": args.landmark_size,
+            "pca_components": args.pca_components,
+        }
+        stats: dict = {}
+        with measure(stats):
+            coords = project_umap(V, params)
+        stats["trustworthiness"] = round(
+            float(trustworthiness(V[sample], coords[sample], n_neighbors=10, metric="cosine")), 4
+        )
+        results["engines"][engine] = stats
+
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
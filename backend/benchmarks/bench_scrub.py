@@ -0,0 +1,99 @@
+# backend/benchmarks/bench_scrub.py
+"""Scrubber throughput on realistic resumes and adversarial inputs.
+
+The three-pass scrubber with unbounded repetitions is timed on the
+adversarial cases at a smaller size (--legacy-adversarial-chars), since it
+goes quadratic on them.
+
+    cd backend && python -m benchmarks.bench_scrub --n 20000
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import random
+import re
+import time
+
+from core.scrub import scrub_many, scrub_pii
+from core.synthetic import synthetic_corpus
+
+LEGACY_EMAIL_RE = re.compile(r"\b[\w\.-]+@[\w\.-]+\.\w+\b")
+LEGACY_PHONE_RE = re.compile(r"(\+?\d[\d\-\s\(\)]{7,}\d)")
+LEGACY_URL_RE = re.compile(r"\bhttps?://\S+\b")
+
+
+def legacy_scrub_pii(text: str) -> str:
+    t = LEGACY_EMAIL_RE.sub("[EMAIL]", text)
+    t = LEGACY_PHONE_RE.sub("[PHONE]", t)
+    t = LEGACY_URL_RE.sub("[URL]", t)
+    return t
+
+
+def with_pii(corpus: list[str], seed: int = 0) -> list[str]:
+    rng = random.Random(seed)
+    out = []
+    for t in corpus:
+        contact = (
+            f"jane.doe{rng.randint(1, 999)}@example.edu | +1 (520) 555-{rng.randint(1000, 9999)} | "
+            f"https://github.com/user{rng.randint(1, 999)}"
+        )
+        out.append(contact + "\n" + t)
+    return out
+
+
+def adversarial(chars: int) -> dict[str, str]:
+    return {
+        "email_no_at": "a." * (chars // 2),
+        "email_bad_domain": "x@" + "a." * (chars // 2) + "!",
+        "digit_table": ("1 2 3 4 5 6 7 8 9 0 | " * (chars // 22)) + "end",
+        "digits_then_parens": "1" + "(" * chars + "x",
+        "url_chain": "http://" * (chars // 7),
+    }
+
+
+def mb_per_sec(fn, texts: list[str]) -> float:
+    t0 = time.perf_counter()
+    fn(texts)
+    return sum(len(t) for t in texts) / 1e6 / (time.perf_counter() - t0)
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--n", type=int, default=20000)
+    ap.add_argument("--adversarial-chars", type=int, default=1_000_000)
+    ap.add_argument("--legacy-adversarial-chars", type=int, default=20_000)
+    args = ap.parse_args()
+
+    corpus = with_pii(synthetic_corpus(args.n))
+    results = {
+        "resumes": {
+            "documents": args.n,
+            "legacy_mb_per_sec": round(mb_per_sec(lambda c: [legacy_scrub_pii(t) for t in c], corpus), 2),
+            "single_pass_mb_per_sec": round(mb_per_sec(scrub_many, corpus), 2),
+        },
+        "adversarial": {},
+    }
+
+    for name, text in adversarial(args.adversarial_chars).items():
+        t0 = time.perf_counter()
+        scrub_pii(text)
+        single = time.perf_counter() - t0
+
+        small = adversarial(args.legacy_adversarial_chars)[name]
+        t0 = time.perf_counter()
+        legacy_scrub_pii(small)
+        legacy = time.perf_counter() - t0
+
+        results["adversarial"][name] = {
+            "single_pass_chars": len(text),
+            "single_pass_s": round(single, 4),
+            "legacy_chars": len(small),
+            "legacy_s": round(legacy, 4),
+        }
+
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,122 @@
+# backend/benchmarks/bench_vector_storage.py
+"""Vector storage modes: bytes per vector, neighbour recall and latency.
+
+Writes the same clustered vectors once per AnalysisRun.vector_storage mode.
+Each mode's top-k from nearest_documents_batch is compared against two
+references: exact float32 cosine neighbours computed in numpy, and the
+float32 run's own (HNSW) results. Needs a Postgres with pgvector
+(DATABASE_URL). Everything runs in a transaction that is rolled back.
+
+    cd backend && python -m benchmarks.bench_vector_storage --n 20000 --dim 384 768
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import time
+
+import django
+
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "config.settings")
+django.setup()
+
+import numpy as np  # noqa: E402
+from django.db import connection, transaction  # noqa: E402
+
+from core.bulk import write_embeddings  # noqa: E402
+from core.models import AnalysisRun, Document  # noqa: E402
+from core.neighbor import nearest_documents_batch  # noqa: E402
+from core.vectors import COLUMNS, VECTOR_STORAGE_MODES  # noqa: E402
+
+from benchmarks.bench_neighbors import clustered_vectors, percentiles  # noqa: E402
+
+COHORT = "__bench_vector_storage__"
+
+
+def exact_topk(V: np.ndarray, rows: np.ndarray, k: int) -> np.ndarray:
+    X = V / (np.linalg.norm(V, axis=1, keepdims=True) + 1e-12)
+    S = X[rows] @ X.T
+    S[np.arange(len(rows)), rows] = -np.inf
+    return np.argsort(-S, axis=1, kind="stable")[:, :k]
+
+
+def recall(found: dict[int, list[dict]], truth: dict[int, set[int]], k: int) -> float:
+    hits = sum(len({n["id"] for n in found[d]} & truth[d]) for d in truth)
+    return round(hits / (k * len(truth)), 4)
+
+
+def bench(n: int, dim: int, queries: int, batch: int, k: int) -> list[dict]:
+    rng = np.random.default_rng(1)
+    V = clustered_vectors(n, dim=dim)
+    out = []
+    with transaction.atomic():
+        docs = Document.objects.bulk_create(
+            [Document(cohort_key=COHORT, filename=f"{i}.txt", file_path="") for i in range(n)],
+            batch_size=5000,
+        )
+        doc_ids = np.array([d.id for d in docs])
+        rows = rng.choice(n, size=queries, replace=False)
+        exact = {int(doc_ids[r]): set(doc_ids[t].tolist()) for r, t in zip(rows, exact_topk(V, rows, k))}
+
+        runs = {}
+        for mode in VECTOR_STORAGE_MODES:
+            run = AnalysisRun.objects.create(
+                cohort_key=COHORT, vector_storage=mode, embedding_dim=dim, status="done"
+            )
+            t0 = time.perf_counter()
+            write_embeddings(run.id, "doc", doc_ids.tolist(), V, storage=mode)
+            runs[mode] = (run, time.perf_counter() - t0)
+        with connection.cursor() as cur:
+            cur.execute("ANALYZE core_docembedding")
+
+        baseline = None
+        for mode, (run, write_s) in runs.items():
+            size_expr = " + ".join(f"coalesce(pg_column_size({c}), 0)" for c in COLUMNS[mode])
+            with connection.cursor() as cur:
+                cur.execute(f"SELECT avg({size_expr}) FROM core_docembedding WHERE run_id = %s", [run.id])
+                bytes_per_vector = float(cur.fetchone()[0])
+
+            query_ids = list(exact)
+            found: dict[int, list[dict]] = {}
+            samples = []
+            for i in range(0, len(query_ids), batch):
+                t0 = time.perf_counter()
+                found.update(nearest_documents_batch(run.id, query_ids[i:i + batch], "doc", k))
+                samples.append(time.perf_counter() - t0)
+            if mode == "float32":
+                baseline = {d: {x["id"] for x in nn} for d, nn in found.items()}
+
+            out.append({
+                "embeddings": n,
+                "dim": dim,
+                "storage": mode,
+                "bytes_per_vector": round(bytes_per_vector, 1),
+                "write_s": round(write_s, 3),
+                f"recall@{k}_vs_exact": recall(found, exact, k),
+                f"recall@{k}_vs_float32": recall(found, baseline, k),
+                "query": f"batch_{batch}",
+                **percentiles(samples),
+            })
+
+        transaction.set_rollback(True)
+    return out
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--n", type=int, default=20000)
+    ap.add_argument("--dim", type=int, nargs="+", default=[384])
+    ap.add_argument("--queries", type=int, default=500)
+    ap.add_argument("--batch", type=int, default=50)
+    ap.add_argument("-k", type=int, default=10)
+    args = ap.parse_args()
+
+    results = []
+    for dim in args.dim:
+        results.extend(bench(args.n, dim, args.queries, args.batch, args.k))
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,103 @@
+# backend/benchmarks/check_extract_prefork.py
+"""Guard: extract_many must work inside a Celery prefork worker.
+
+Starts a real `celery worker -P prefork` (filesystem broker and result backend in
+a temp dir, so no Redis needed) and runs extract_many from a task. Prefork task
+processes are daemonic, so a multiprocessing pool there fails with "daemonic
+processes are not allowed to have children". Checks:
+- real .txt files extract through a multi-process pool
+- files that only waited in the queue are not timed out (6 x 0.7 s, 2 workers, 1 s limit)
+- a stuck file times out without failing the others
+Exits 1 on regression, so CI can run it.
+
+    cd backend && python -m benchmarks.check_extract_prefork
+"""
+from __future__ import annotations
+
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+from celery import Celery
+
+STATE_DIR = os.environ.get("CHECK_EXTRACT_PREFORK_DIR") or tempfile.mkdtemp(prefix="check_extract_prefork_")
+os.environ["CHECK_EXTRACT_PREFORK_DIR"] = STATE_DIR  # the worker subprocess shares it
+for sub in ("queue", "results"):
+    os.makedirs(os.path.join(STATE_DIR, sub), exist_ok=True)
+
+app = Celery("check_extract_prefork")
+app.conf.update(
+    broker_url="filesystem://",
+    broker_transport_options={
+        "data_folder_in": os.path.join(STATE_DIR, "queue"),
+        "data_folder_out": os.path.join(STATE_DIR, "queue"),
+    },
+    result_backend=f"file://{os.path.join(STATE_DIR, 'results')}",
+    worker_hijack_root_logger=False,
+)
+
+
+def _fake_extract(path: str) -> tuple[str, str]:
+    if path.startswith("stuck:"):
+        time.sleep(3600)
+    time.sleep(0.7)
+    return path, path
+
+
+@app.task(name="check_extract_prefork.run_extract")  # same name whether imported or run as __main__
+def run_extract(paths: list[str], workers: int, timeout: float, fake: bool = False) -> list:
+    from core import extract_pool
+
+    if fake:  # pool processes fork from this one, so they inherit the stand-in
+        extract_pool.extract_and_scrub = _fake_extract
+    return [
+        r[0] if isinstance(r, tuple) else type(r).__name__
+        for r in extract_pool.extract_many(paths, workers=workers, timeout=timeout)
+    ]
+
+
+def main():
+    txt = []
+    for i in range(4):
+        path = os.path.join(STATE_DIR, f"resume{i}.txt")
+        with open(path, "w") as fh:
+            fh.write(f"Resume {i}\nSkills\npython")
+        txt.append(path)
+    cases = [
+        ("txt files", (txt, 2, 30.0), [f"Resume {i}\nSkills\npython" for i in range(4)]),
+        ("queue wait", ([f"f{i}" for i in range(6)], 2, 1.0, True), [f"f{i}" for i in range(6)]),
+        ("stuck file", (["a", "stuck:b", "c"], 2, 2.0, True), ["a", "TimeoutError", "c"]),
+    ]
+
+    worker = subprocess.Popen(
+        [sys.executable, "-m", "celery", "-A", "benchmarks.check_extract_prefork", "worker",
+         "-P", "prefork", "-c", "1", "--loglevel", "WARNING",
+         "--without-mingle", "--without-gossip", "--without-heartbeat"],
+        env=os.environ.copy(),
+        stdout=sys.stderr,  # keep stdout for the JSON report
+    )
+    failures, out = [], []
+    try:
+        for name, args, expected in cases:
+            try:
+                got = run_extract.delay(*args).get(timeout=120)
+            except Exception as e:
+                got = f"{type(e).__name__}: {e}"
+            out.append({"case": name, "result": got})
+            if got != expected:
+                failures.append(f"{name}: expected {expected}, got {got}")
+    finally:
+        worker.terminate()
+        worker.wait(timeout=30)
+        shutil.rmtree(STATE_DIR, ignore_errors=True)
+
+    print(json.dumps({"cases": out, "ok": not failures, "failures": failures}, indent=2))
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,73 @@
+# backend/benchmarks/check_web_startup.py
+"""Guard: the web process must boot without the ML stack.
+
+Runs the web startup path in a fresh interpreter: django.setup(), the WSGI
+app, and every URL pattern resolved, which imports all views. It then
+checks three things:
+- none of the worker-only modules were imported
+- import time is under --max-seconds
+- RSS is under --max-rss-mb
+Exits 1 on regression, so CI can run it.
+
+    cd backend && python -m benchmarks.check_web_startup
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+
+HEAVY = ["torch", "sentence_transformers", "transformers", "umap", "hdbscan", "numba", "pdfplumber", "docx"]
+
+PROBE = r"""
+import json, sys, time
+t0 = time.perf_counter()
+import django
+django.setup()
+from django.core.wsgi import get_wsgi_application
+from django.urls import get_resolver
+get_wsgi_application()
+get_resolver().url_patterns  # imports config.urls -> core.urls -> core.views
+seconds = time.perf_counter() - t0
+
+from core.profiling import current_rss_bytes
+heavy = json.loads(sys.argv[1])
+print(json.dumps({
+    "seconds": round(seconds, 3),
+    "rss_mb": round(current_rss_bytes() / 2**20, 1),
+    "heavy_modules_loaded": [m for m in heavy if m in sys.modules],
+}))
+"""
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--max-seconds", type=float, default=3.0)
+    ap.add_argument("--max-rss-mb", type=float, default=200.0)
+    args = ap.parse_args()
+
+    env = {**os.environ, "DJANGO_SETTINGS_MODULE": os.environ.get("DJANGO_SETTINGS_MODULE", "config.settings")}
+    proc = subprocess.run(
+        [sys.executable, "-c", PROBE, json.dumps(HEAVY)], capture_output=True, text=True, env=env
+    )
+    if proc.returncode != 0:
+        sys.stderr.write(proc.stderr)
+        sys.exit(proc.returncode)
+
+    result = json.loads(proc.stdout.strip().splitlines()[-1])
+    failures = []
+    if result["heavy_modules_loaded"]:
+        failures.append(f"worker-only modules imported: {', '.join(result['heavy_modules_loaded'])}")
+    if result["seconds"] > args.max_seconds:
+        failures.append(f"startup took {result['seconds']}s (max {args.max_seconds}s)")
+    if result["rss_mb"] > args.max_rss_mb:
+        failures.append(f"RSS {result['rss_mb']} MB (max {args.max_rss_mb} MB)")
+
+    print(json.dumps({**result, "ok": not failures, "failures": failures}, indent=2))
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
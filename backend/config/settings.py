@@ -18,6 +18,7 @@ INSTALLED_APPS = [
     "django.contrib.admin",
     "django.contrib.messages",
     "django.contrib.staticfiles",
+    "django.contrib.postgres",  # OpClass in the expression HNSW indexes (core/models.py)
     "rest_framework",
     "corsheaders",
     "pgvector.django",
@@ -54,7 +55,8 @@ TEMPLATES = [
 WSGI_APPLICATION = "config.wsgi.application"
 
 DATABASES = {
-    "default": dj_database_url.config(conn_max_age=600, ssl_require=True)
+    # 0 under gevent workers: persistent connections are per greenlet and would pile up
+    "default": dj_database_url.config(conn_max_age=int(os.getenv("DB_CONN_MAX_AGE", "600")), ssl_require=True)
 }
 
 # CORS: lock down in prod
@@ -65,6 +67,8 @@ CORS_ALLOWED_ORIGINS = (
     if os.environ.get("CORS_ALLOWED_ORIGINS")
     else []
 )
+# List endpoints return the next page's cursor in this header
+CORS_EXPOSE_HEADERS = ["X-Next-Cursor"]
 
 STATIC_URL = "/static/"
 STATIC_ROOT = BASE_DIR / "staticfiles"
@@ -102,6 +106,75 @@ if USE_S3:
 REDIS_URL = os.environ.get("REDIS_URL", "redis://localhost:6379/0")
 CELERY_BROKER_URL = REDIS_URL
 CELERY_RESULT_BACKEND = REDIS_URL
+# Run progress events (core/progress.py): how long the last event is kept, and the SSE stream's
+# keep-alive interval and lifetime (EventSource reconnects on its own after it closes)
+RUN_PROGRESS_TTL_S = int(os.getenv("RUN_PROGRESS_TTL_S", str(24 * 3600)))
+RUN_PROGRESS_HEARTBEAT_S = float(os.getenv("RUN_PROGRESS_HEARTBEAT_S", "15"))
+RUN_PROGRESS_STREAM_MAX_S = float(os.getenv("RUN_PROGRESS_STREAM_MAX_S", "300"))
+# Pipeline stages (core/tasks.py) retry transient errors this many times before failing the run
+STAGE_MAX_RETRIES = int(os.getenv("STAGE_MAX_RETRIES", "2"))
+STAGE_RETRY_DELAY_S = int(os.getenv("STAGE_RETRY_DELAY_S", "10"))
+# Worker metrics endpoint for stage profiles (needs prometheus_client; 0 disables)
+PROMETHEUS_METRICS_PORT = int(os.getenv("PROMETHEUS_METRICS_PORT", "0"))
+
+# Archive upload (core/ingest.py): file count, per-file and total uncompressed size caps;
+# members above INGEST_SPOOL_MAX_BYTES spill from memory to a temp file while being hashed
+INGEST_MAX_FILES = int(os.getenv("INGEST_MAX_FILES", "10000"))
+INGEST_MAX_FILE_BYTES = int(os.getenv("INGEST_MAX_FILE_BYTES", str(20 * 1024 * 1024)))
+INGEST_MAX_TOTAL_BYTES = int(os.getenv("INGEST_MAX_TOTAL_BYTES", str(512 * 1024 * 1024)))
+INGEST_SPOOL_MAX_BYTES = int(os.getenv("INGEST_SPOOL_MAX_BYTES", str(2 * 1024 * 1024)))
+
+# Document and run lists (core/pagination.py): default and maximum ?limit=
+LIST_PAGE_SIZE = int(os.getenv("LIST_PAGE_SIZE", "200"))
+LIST_PAGE_MAX = int(os.getenv("LIST_PAGE_MAX", "1000"))
+
+# Cohort deletion: stored files per batch (S3 DeleteObjects takes at most 1000) and documents per DB transaction
+DELETE_STORAGE_BATCH = int(os.getenv("DELETE_STORAGE_BATCH", "1000"))
+DELETE_DB_CHUNK = int(os.getenv("DELETE_DB_CHUNK", "500"))
+# Uploads and runs are refused while a cohort's deletion job is queued or running; one older than
+# this is assumed dead (worker killed mid-job) and stops blocking the cohort
+DELETE_JOB_STALE_S = float(os.getenv("DELETE_JOB_STALE_S", str(6 * 3600)))
+
+# Analysis pipeline
+# Extraction pool size (<= 1 runs inline) and per-file timeout in seconds
+EXTRACT_WORKERS = int(os.getenv("EXTRACT_WORKERS", str(min(4, os.cpu_count() or 1))))
+EXTRACT_TIMEOUT_S = float(os.getenv("EXTRACT_TIMEOUT_S", "60"))
+# How long a run waits for upload-time extraction of its cohort before skipping stragglers,
+# and how often it checks (the extract stage is rescheduled meanwhile, not holding a worker)
+EXTRACT_WAIT_TIMEOUT_S = float(os.getenv("EXTRACT_WAIT_TIMEOUT_S", "120"))
+EXTRACT_WAIT_POLL_S = float(os.getenv("EXTRACT_WAIT_POLL_S", "5"))
+# An "extracting" claim older than this is assumed dead (worker crash, hard time limit, redeploy) and retaken
+EXTRACT_CLAIM_STALE_S = float(os.getenv("EXTRACT_CLAIM_STALE_S", "900"))
+EMBED_BATCH_SIZE = int(os.getenv("EMBED_BATCH_SIZE", "64"))
+# Models the worker loads before forking (shared by its children), and how many other models each child keeps
+EMBED_PRELOAD_MODELS = [
+    m.strip() for m in os.getenv("EMBED_PRELOAD_MODELS", "sentence-transformers/all-MiniLM-L6-v2").split(",") if m.strip()
+]
+EMBED_MODEL_CACHE_SIZE = int(os.getenv("EMBED_MODEL_CACHE_SIZE", "2"))
+# ~600 MB of 384-dim float32 vectors; least recently used entries are evicted after each run
+EMBED_CACHE_MAX_ENTRIES = int(os.getenv("EMBED_CACHE_MAX_ENTRIES", "400000"))
+# "copy" streams rows with binary COPY (Postgres + psycopg 3); "bulk_create" is the portable fallback
+BULK_WRITE_MODE = os.getenv("BULK_WRITE_MODE", "copy")
+BULK_WRITE_BATCH_SIZE = int(os.getenv("BULK_WRITE_BATCH_SIZE", "2000"))
+# How new runs store their vectors unless the request says otherwise: float32, halfvec or int8 (core/vectors.py)
+VECTOR_STORAGE_DEFAULT = os.getenv("VECTOR_STORAGE_DEFAULT", "float32")
+# int8 runs are searched in numpy; each web process keeps recently used runs' codes up to this many bytes
+INT8_CACHE_MAX_BYTES = int(os.getenv("INT8_CACHE_MAX_BYTES", str(256 * 1024 * 1024)))
+# pgvector HNSW search knobs; iterative scans (pgvector >= 0.8) keep filtered searches from coming back short
+HNSW_EF_SEARCH = int(os.getenv("HNSW_EF_SEARCH", "100"))
+HNSW_ITERATIVE_SCAN = os.getenv("HNSW_ITERATIVE_SCAN", "relaxed_order")  # "" to skip (pgvector < 0.8)
+NEIGHBOR_BATCH_MAX = int(os.getenv("NEIGHBOR_BATCH_MAX", "500"))
+# Largest ?k= the neighbour endpoints serve; bigger values are clamped to it
+NEIGHBOR_K_MAX = int(os.getenv("NEIGHBOR_K_MAX", "100"))
+# Precomputed per-run neighbour graph: neighbours kept per document, and similarity tile size
+NEIGHBOR_GRAPH_K = int(os.getenv("NEIGHBOR_GRAPH_K", "20"))
+NEIGHBOR_GRAPH_BLOCK = int(os.getenv("NEIGHBOR_GRAPH_BLOCK", "1024"))
+# HDBSCAN: boruvka above this many points, prims below; core distances use this many processes
+CLUSTER_BORUVKA_MIN_POINTS = int(os.getenv("CLUSTER_BORUVKA_MIN_POINTS", "5000"))
+CLUSTER_CORE_DIST_N_JOBS = int(os.getenv("CLUSTER_CORE_DIST_N_JOBS", str(os.cpu_count() or 1)))
+# Projection tiles: at most TILE_GRID^2 points per tile; deeper zooms are not precomputed
+TILE_GRID = int(os.getenv("TILE_GRID", "16"))
+TILE_MAX_ZOOM = int(os.getenv("TILE_MAX_ZOOM", "12"))
 
 DEFAULT_AUTO_FIELD = "django.db.models.BigAutoField"
 REST_FRAMEWORK = {
@@ -0,0 +1,111 @@
+# backend/core/bulk.py
+from __future__ import annotations
+
+from typing import Iterable
+
+import numpy as np
+from django.conf import settings
+from django.db import connection
+
+from core import vectors
+from core.models import DocEmbedding, DocProjection
+
+
+def _can_copy() -> bool:
+    # Binary COPY needs Postgres through psycopg 3; anything else uses bulk_create.
+    return (
+        settings.BULK_WRITE_MODE == "copy"
+        and connection.vendor == "postgresql"
+        and connection.Database.__name__ == "psycopg"
+    )
+
+
+def _copy_rows(model, columns: list[str], types: list[str], rows: Iterable[tuple]) -> None:
+    from pgvector.psycopg import register_vector
+
+    with connection.cursor() as cur:
+        raw = cur.cursor
+        if raw.connection.adapters.types.get("vector") is None:
+            register_vector(raw.connection)
+        sql = f"COPY {model._meta.db_table} ({', '.join(columns)}) FROM STDIN WITH (FORMAT BINARY)"
+        with raw.copy(sql) as copy:
+            copy.set_types(types)
+            for row in rows:
+                copy.write_row(row)
+
+
+def write_embeddings(
+    run_id: int,
+    section: str,
+    doc_ids: list[int],
+    V: np.ndarray,
+    hashes: list[str] | None = None,
+    storage: str = "float32",
+) -> None:
+    """Store one section's vectors in the run's storage mode (core/vectors.py)."""
+    V = np.ascontiguousarray(V, dtype=np.float32)
+    dim = V.shape[1]
+    norms = np.linalg.norm(V, axis=1) + 1e-12
+    hashes = hashes or [""] * len(doc_ids)
+    columns = vectors.COLUMNS[storage]
+
+    if _can_copy():
+        _copy_rows(
+            DocEmbedding,
+            ["document_id", "run_id", "section", "dim", *columns, "norm", "text_sha256"],
+            ["int8", "int8", "varchar", "int4", *vectors.COPY_TYPES[storage], "float8", "varchar"],
+            (
+                (d, run_id, section, dim, *stored, float(n), h)
+                for d, stored, n, h in zip(doc_ids, vectors.encode(storage, V), norms, hashes)
+            ),
+        )
+        return
+
+    DocEmbedding.objects.bulk_create(
+        (
+            DocEmbedding(
+                document_id=d,
+                run_id=run_id,
+                section=section,
+                dim=dim,
+                norm=float(n),
+                text_sha256=h,
+                **dict(zip(columns, stored)),
+            )
+            for d, stored, n, h in zip(doc_ids, vectors.encode(storage, V), norms, hashes)
+        ),
+        batch_size=settings.BULK_WRITE_BATCH_SIZE,
+    )
+
+
+def write_projections(
+    run_id: int,
+    section: str,
+    doc_ids: list[int],
+    coords: np.ndarray,
+    labels: np.ndarray,
+    outlier: np.ndarray,
+) -> None:
+    rows = (
+        (d, run_id, section, float(x), float(y), int(lab), float(sc))
+        for d, (x, y), lab, sc in zip(doc_ids, coords, labels, outlier)
+    )
+
+    if _can_copy():
+        _copy_rows(
+            DocProjection,
+            ["document_id", "run_id", "section", "x", "y", "cluster_id", "outlier_score"],
+            ["int8", "int8", "varchar", "float8", "float8", "int4", "float8"],
+            rows,
+        )
+        return
+
+    DocProjection.objects.bulk_create(
+        (
+            DocProjection(
+                document_id=d, run_id=r, section=s, x=x, y=y, cluster_id=lab, outlier_score=sc
+            )
+            for d, r, s, x, y, lab, sc in rows
+        ),
+        batch_size=settings.BULK_WRITE_BATCH_SIZE,
+    )
@@ -1,6 +1,6 @@
 # backend/core/chunking.py
 import re
-from collections import defaultdict
+from typing import Iterator
 
 HEADERS = {
     "skills": [r"^skills?\b", r"^technical skills?\b", r"^core competencies\b", r"^tools?\b"],
@@ -9,32 +9,41 @@ HEADERS = {
     "education": [r"^education\b", r"^academic\b"],
 }
 
-def chunk_sections(text: str) -> dict[str, str]:
-    lines = [ln.strip() for ln in text.splitlines()]
-    lines = [ln for ln in lines if ln]
+# One alternation, one named group per section, in HEADERS order so the first section listed still wins.
+HEADER_RE = re.compile(
+    "|".join(
+        f"(?P<{section}>{'|'.join(p.lstrip('^') for p in pats)})"
+        for section, pats in HEADERS.items()
+    )
+)
+
+# Same line boundaries as str.splitlines()
+_LINE_RE = re.compile(r"[^\n\r\x0b\x0c\x1c\x1d\x1e\x85\u2028\u2029]+")
+
+
+def iter_lines(text: str) -> Iterator[str]:
+    """Stripped, non-empty lines of `text`, without materialising the whole split."""
+    for m in _LINE_RE.finditer(text):
+        ln = m.group().strip()
+        if ln:
+            yield ln
 
+
+def chunk_sections(text: str) -> dict[str, str]:
     current = "other"
-    out = defaultdict(list)
-
-    for ln in lines:
-        low = ln.lower()
-
-        matched = None
-        for section, pats in HEADERS.items():
-            for p in pats:
-                if re.match(p, low):
-                    matched = section
-                    break
-            if matched:
-                break
-
-        if matched:
-            current = matched
+    out: dict[str, list[str]] = {}
+    doc: list[str] = []
+
+    for ln in iter_lines(text):
+        doc.append(ln)
+        m = HEADER_RE.match(ln.lower())
+        if m:
+            current = m.lastgroup
             continue
-
-        out[current].append(ln)
+        out.setdefault(current, []).append(ln)
 
     # Always include full doc view
-    out["doc"] = lines
+    out["doc"] = doc
 
-    return {k: "\n".join(v).strip() for k, v in out.items() if "\n".join(v).strip()}
+    joined = {k: "\n".join(v).strip() for k, v in out.items()}
+    return {k: v for k, v in joined.items() if v}
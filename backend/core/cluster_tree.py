@@ -0,0 +1,44 @@
+# backend/core/cluster_tree.py
+"""Stored HDBSCAN hierarchies for re-clustering finished runs.
+
+HDBSCAN's expensive part (core distances + minimum spanning tree) depends on
+min_samples but not on min_cluster_size; the latter only decides how the
+single-linkage tree is condensed. Keeping that tree makes a new
+min_cluster_size a matter of milliseconds. The condensed tree itself is tied
+to one min_cluster_size, so it is not what gets stored.
+"""
+from __future__ import annotations
+
+import numpy as np
+
+from core.models import ClusterTree
+from core.umap_project import clusters_from_tree
+
+
+def store_cluster_tree(run_id: int, section: str, doc_ids: list[int], tree: np.ndarray, params: dict) -> ClusterTree:
+    return ClusterTree.objects.create(
+        run_id=run_id,
+        section=section,
+        params=params,
+        doc_ids=np.asarray(doc_ids, dtype=np.int64).tobytes(),
+        tree=np.ascontiguousarray(tree, dtype=np.float64).tobytes(),
+    )
+
+
+def recluster(run_id: int, section: str, min_cluster_size: int, cluster_selection_method: str = "eom") -> dict | None:
+    """Labels and outlier scores for a new min_cluster_size, or None when no tree was kept."""
+    stored = ClusterTree.objects.filter(run_id=run_id, section=section).first()
+    if stored is None:
+        return None
+    doc_ids = np.frombuffer(bytes(stored.doc_ids), dtype=np.int64)
+    tree = np.frombuffer(bytes(stored.tree), dtype=np.float64).reshape(-1, 4)
+    labels, scores = clusters_from_tree(tree, min_cluster_size, cluster_selection_method)
+    return {
+        "params": {**stored.params, "min_cluster_size": min_cluster_size, "cluster_selection_method": cluster_selection_method},
+        "n_clusters": int(labels.max()) + 1 if labels.size else 0,
+        "n_noise": int((labels < 0).sum()),
+        "points": [
+            {"document_id": int(d), "cluster_id": int(c), "outlier_score": float(s)}
+            for d, c, s in zip(doc_ids, labels, scores)
+        ],
+    }
@@ -0,0 +1,152 @@
+# backend/core/deletion.py
+"""Background cohort deletion (DeletionJob).
+
+Stored files go first, in batches: one S3 DeleteObjects call per
+DELETE_STORAGE_BATCH keys (1000 is the S3 maximum), or plain unlinks for the
+local filesystem. Database rows follow in DELETE_DB_CHUNK-document
+transactions, so no single transaction holds locks on the whole cohort.
+
+While a job is queued or running the cohort is closed: the upload and run
+endpoints refuse it (cohort_deleting), and the job fails the cohort's active
+runs before touching anything, so their remaining stages stop.
+"""
+from __future__ import annotations
+
+import os
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.files.storage import FileSystemStorage, default_storage
+from django.db import transaction
+from django.utils import timezone
+
+from core import progress
+from core.models import AnalysisRun, AuditEvent, DeletionJob, DocEmbedding, DocProjection, Document
+
+ACTIVE_JOB_STATUSES = ("queued", "running")
+ACTIVE_RUN_STATUSES = ("pending", "queued", "running")
+
+
+def _chunks(items: list, size: int):
+    for i in range(0, len(items), size):
+        yield items[i:i + size]
+
+
+def _delete_s3(storage, names: list[str]) -> list[str]:
+    from storages.utils import clean_name
+
+    failed: list[str] = []
+    for batch in _chunks(names, settings.DELETE_STORAGE_BATCH):
+        keys = {storage._normalize_name(clean_name(n)): n for n in batch}
+        res = storage.bucket.delete_objects(
+            Delete={"Objects": [{"Key": k} for k in keys], "Quiet": True}
+        )
+        failed.extend(keys[e["Key"]] for e in res.get("Errors", []) if e.get("Code") != "NoSuchKey")
+    return failed
+
+
+def _delete_local(storage: FileSystemStorage, names: list[str]) -> list[str]:
+    failed: list[str] = []
+    for n in names:
+        try:
+            os.unlink(storage.path(n))
+        except FileNotFoundError:
+            pass
+        except OSError:
+            failed.append(n)
+    return failed
+
+
+def delete_stored_files(names: list[str], storage=default_storage) -> list[str]:
+    """Delete stored files in batches; returns the names that could not be deleted."""
+    if hasattr(storage, "bucket") and hasattr(storage, "_normalize_name"):  # django-storages S3
+        return _delete_s3(storage, names)
+    if isinstance(storage, FileSystemStorage):
+        return _delete_local(storage, names)
+    failed = []
+    for n in names:
+        try:
+            storage.delete(n)
+        except Exception:
+            failed.append(n)
+    return failed
+
+
+def active_deletion_job(cohort_key: str) -> DeletionJob | None:
+    """The cohort's queued or running deletion job, if any; one older than DELETE_JOB_STALE_S is taken as dead."""
+    since = timezone.now() - timedelta(seconds=settings.DELETE_JOB_STALE_S)
+    return (
+        DeletionJob.objects.filter(cohort_key=cohort_key, status__in=ACTIVE_JOB_STATUSES, created_at__gte=since)
+        .order_by("-id")
+        .first()
+    )
+
+
+def cohort_deleting(cohort_key: str) -> bool:
+    return active_deletion_job(cohort_key) is not None
+
+
+def cancel_cohort_runs(cohort_key: str, job_id: int) -> int:
+    """Fail the cohort's unfinished runs; their pending stages see the status and stop (tasks._run_stage)."""
+    error = f"cohort deleted (deletion job {job_id})"
+    run_ids = list(
+        AnalysisRun.objects.filter(cohort_key=cohort_key, status__in=ACTIVE_RUN_STATUSES).values_list("id", flat=True)
+    )
+    AnalysisRun.objects.filter(id__in=run_ids, status__in=ACTIVE_RUN_STATUSES).update(status="failed", error=error)
+    for run_id in run_ids:
+        progress.publish(run_id, type="run", status="failed", error=error)
+    return len(run_ids)
+
+
+def run_deletion_job(job_id: int) -> None:
+    job = DeletionJob.objects.get(id=job_id)
+    job.status = "running"
+    job.save(update_fields=["status"])
+    try:
+        cancel_cohort_runs(job.cohort_key, job.id)
+
+        docs = Document.objects.filter(cohort_key=job.cohort_key)
+        doc_ids = list(docs.order_by("id").values_list("id", flat=True))
+        paths = [p for p in docs.values_list("file_path", flat=True) if p]
+        job.files_total = len(paths)
+        job.save(update_fields=["files_total"])
+
+        for batch in _chunks(paths, settings.DELETE_STORAGE_BATCH):
+            failed = delete_stored_files(batch)  # keep going; DB deletion still proceeds
+            job.files_deleted += len(batch) - len(failed)
+            job.file_errors += len(failed)
+            job.save(update_fields=["files_deleted", "file_errors"])
+
+        for chunk in _chunks(doc_ids, settings.DELETE_DB_CHUNK):
+            with transaction.atomic():
+                DocEmbedding.objects.filter(document_id__in=chunk).delete()
+                DocProjection.objects.filter(document_id__in=chunk).delete()
+                Document.objects.filter(id__in=chunk).delete()
+            job.documents_deleted += len(chunk)
+            job.save(update_fields=["documents_deleted"])
+
+        # per-section rows are gone with the documents; each run now cascades only its small artefacts
+        for run_id in AnalysisRun.objects.filter(cohort_key=job.cohort_key).values_list("id", flat=True):
+            AnalysisRun.objects.filter(id=run_id).delete()
+            job.runs_deleted += 1
+        job.status = "done"
+    except Exception as e:
+        job.status = "failed"
+        job.error = str(e)
+        raise
+    finally:
+        job.finished_at = timezone.now()
+        job.save(update_fields=["status", "error", "runs_deleted", "finished_at"])
+        AuditEvent.objects.create(
+            action="cohort_delete",
+            cohort_key=job.cohort_key,
+            actor=job.actor,
+            detail={
+                "job_id": job.id,
+                "status": job.status,
+                "documents_deleted": job.documents_deleted,
+                "files_deleted": job.files_deleted,
+                "file_errors": job.file_errors,
+                "runs_deleted": job.runs_deleted,
+            },
+        )
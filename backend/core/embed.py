@@ -1,19 +1,106 @@
 # backend/core/embed.py
 from __future__ import annotations
+from collections import OrderedDict
+from typing import TYPE_CHECKING, Callable
 import numpy as np
-from sentence_transformers import SentenceTransformer
 
-_MODEL_CACHE: dict[str, SentenceTransformer] = {}
+if TYPE_CHECKING:  # torch + transformers: loaded on first use, never by the web process
+    from sentence_transformers import SentenceTransformer
+
+# Ordered least to most recently used. Pinned models (preloaded by the worker
+# before forking, so children share their weights) are never evicted.
+_MODEL_CACHE: OrderedDict[str, SentenceTransformer] = OrderedDict()
+_PINNED: set[str] = set()
+_MODEL_CACHE_SIZE = 2  # unpinned models; the worker sets EMBED_MODEL_CACHE_SIZE at startup
+
+DEFAULT_BATCH_SIZE = 64
+
+def set_model_cache_size(size: int) -> None:
+    global _MODEL_CACHE_SIZE
+    _MODEL_CACHE_SIZE = max(1, int(size))
+    _evict()
+
+def _evict() -> None:
+    unpinned = [name for name in _MODEL_CACHE if name not in _PINNED]
+    for name in unpinned[:max(0, len(unpinned) - _MODEL_CACHE_SIZE)]:
+        del _MODEL_CACHE[name]
+
+def register_model(name: str, model, pinned: bool = False) -> None:
+    _MODEL_CACHE[name] = model
+    _MODEL_CACHE.move_to_end(name)
+    if pinned:
+        _PINNED.add(name)
+    _evict()
+
+def _load(name: str) -> SentenceTransformer:
+    from sentence_transformers import SentenceTransformer
+
+    return SentenceTransformer(name)
 
 def get_model(name: str) -> SentenceTransformer:
-    if name not in _MODEL_CACHE:
-        _MODEL_CACHE[name] = SentenceTransformer(name)
-    return _MODEL_CACHE[name]
+    model = _MODEL_CACHE.get(name)
+    if model is None:
+        register_model(name, _load(name))
+        return _MODEL_CACHE[name]
+    _MODEL_CACHE.move_to_end(name)
+    return model
 
-def embed_text(model_name: str, text: str) -> np.ndarray:
+def preload_models(names: list[str]) -> None:
+    """Load and pin models, e.g. in the worker parent so forked children share them."""
+    for name in names:
+        model = _MODEL_CACHE.get(name) or _load(name)
+        model.eval()
+        register_model(name, model, pinned=True)
+
+def warm_up(names: list[str]) -> None:
+    # One tiny encode initialises tokenizers and thread pools; run it per process, after fork.
+    for name in names:
+        if name in _MODEL_CACHE:
+            _MODEL_CACHE[name].encode(["warm-up"], show_progress_bar=False)
+
+def _token_lengths(model: SentenceTransformer, texts: list[str]) -> np.ndarray:
+    tokenizer = getattr(model, "tokenizer", None)
+    if tokenizer is None:
+        return np.fromiter((len(t) for t in texts), dtype=np.int64, count=len(texts))
+    ids = tokenizer(texts, add_special_tokens=False, truncation=False)["input_ids"]
+    return np.fromiter((len(x) for x in ids), dtype=np.int64, count=len(texts))
+
+def embed_texts(
+    model_name: str,
+    texts: list[str],
+    batch_size: int = DEFAULT_BATCH_SIZE,
+    on_batch: Callable[[int], None] | None = None,
+) -> np.ndarray:
+    """Encode `texts` into one (n, dim) float32 matrix, in input order.
+
+    Inputs are sorted by token length so each batch pads to a similar length,
+    encoded `batch_size` at a time, and scattered back to their original rows.
+    `on_batch`, if given, is called with the number of texts encoded so far.
+    """
     model = get_model(model_name)
-    vec = model.encode([text], normalize_embeddings=False)[0]
-    return vec.astype(np.float32)
+    dim = model.get_sentence_embedding_dimension()
+    out = np.empty((len(texts), dim), dtype=np.float32)
+    if not texts:
+        return out
+
+    order = np.argsort(-_token_lengths(model, texts), kind="stable")
+    batch_size = max(1, int(batch_size))
+    for start in range(0, len(order), batch_size):
+        idx = order[start:start + batch_size]
+        vecs = model.encode(
+            [texts[i] for i in idx],
+            batch_size=len(idx),
+            normalize_embeddings=False,
+            convert_to_numpy=True,
+            show_progress_bar=False,
+        )
+        out[idx] = vecs
+        if on_batch is not None:
+            on_batch(start + len(idx))
+    return out
+
+def embed_text(model_name: str, text: str) -> np.ndarray:
+    return embed_texts(model_name, [text], batch_size=1)[0]
 
 def l2_norm(vec: np.ndarray) -> float:
     return float(np.linalg.norm(vec) + 1e-12)
@@ -0,0 +1,76 @@
+# backend/core/embed_cache.py
+from __future__ import annotations
+
+import hashlib
+from typing import Callable
+
+import numpy as np
+from django.utils import timezone
+
+from core.embed import embed_texts
+from core.models import EmbeddingCacheEntry
+
+
+def text_sha256(text: str) -> str:
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+def cached_embed_texts(
+    model_name: str,
+    chunking_version: str,
+    section: str,
+    texts: list[str],
+    batch_size: int,
+    on_progress: Callable[[int, int], None] | None = None,
+) -> tuple[np.ndarray, int, int]:
+    """Like `embed_texts`, but only encodes texts missing from the cache.
+
+    Returns (vectors, hits, misses). New vectors are written back to the cache.
+    `on_progress(done, total)` counts cache hits as done up front.
+    """
+    hashes = [text_sha256(t) for t in texts]
+    key = {"embedding_model": model_name, "chunking_version": chunking_version, "section": section}
+
+    cached = dict(
+        EmbeddingCacheEntry.objects.filter(**key, text_sha256__in=set(hashes))
+        .values_list("text_sha256", "vector")
+    )
+
+    miss_idx = [i for i, h in enumerate(hashes) if h not in cached]
+    if not miss_idx and texts:
+        V = np.vstack([cached[h] for h in hashes]).astype(np.float32)
+    else:
+        hits = len(texts) - len(miss_idx)
+        on_batch = (lambda n: on_progress(hits + n, len(texts))) if on_progress else None
+        fresh = embed_texts(model_name, [texts[i] for i in miss_idx], batch_size=batch_size, on_batch=on_batch)
+        V = np.empty((len(texts), fresh.shape[1]), dtype=np.float32)
+        V[miss_idx] = fresh
+        for i, h in enumerate(hashes):
+            if h in cached:
+                V[i] = cached[h]
+
+    if cached:
+        EmbeddingCacheEntry.objects.filter(**key, text_sha256__in=list(cached)).update(
+            last_used_at=timezone.now()
+        )
+    if miss_idx:
+        new_entries = {hashes[i]: V[i] for i in miss_idx}  # dedupe repeated texts
+        EmbeddingCacheEntry.objects.bulk_create(
+            [EmbeddingCacheEntry(**key, text_sha256=h, vector=vec) for h, vec in new_entries.items()],
+            batch_size=1000,
+            ignore_conflicts=True,
+        )
+
+    return V, len(texts) - len(miss_idx), len(miss_idx)
+
+
+def evict_embedding_cache(max_entries: int) -> int:
+    """Drop least-recently-used entries until at most `max_entries` remain."""
+    excess = EmbeddingCacheEntry.objects.count() - max_entries
+    if excess <= 0:
+        return 0
+    stale_ids = list(
+        EmbeddingCacheEntry.objects.order_by("last_used_at", "id").values_list("id", flat=True)[:excess]
+    )
+    deleted, _ = EmbeddingCacheEntry.objects.filter(id__in=stale_ids).delete()
+    return deleted
@@ -0,0 +1,56 @@
+# backend/core/extract_pool.py
+from __future__ import annotations
+
+# billiard (Celery's fork of multiprocessing) rather than concurrent.futures: prefork
+# task processes are daemonic, and multiprocessing refuses to start children from those.
+from billiard.einfo import ExceptionWithTraceback
+from billiard.exceptions import TimeLimitExceeded
+from billiard.pool import Pool
+
+from core.scrub import scrub_pii
+from core.text_extract import extract_text
+
+ExtractResult = tuple[str, str] | Exception
+
+
+def extract_and_scrub(path: str) -> tuple[str, str]:
+    text = extract_text(path)
+    return text, scrub_pii(text)
+
+
+def extract_many(paths: list[str], workers: int, timeout: float) -> list[ExtractResult]:
+    """Extract + scrub every path; returns (raw, scrubbed) or the exception, in order.
+
+    Runs in a pool of `workers` processes, safe to start from inside a Celery
+    prefork task. A file still running `timeout` seconds after a worker picked it
+    up fails with TimeoutError: that worker is killed and replaced while the
+    others carry on. Time spent queued behind other files does not count.
+    With workers <= 1 everything runs inline with no timeout.
+    """
+    results: list[ExtractResult | None] = [None] * len(paths)
+
+    if workers <= 1:
+        for i, path in enumerate(paths):
+            try:
+                results[i] = extract_and_scrub(path)
+            except Exception as e:
+                results[i] = e
+        return results
+
+    pool = Pool(processes=min(workers, len(paths)), timeout=timeout)
+    try:
+        jobs = [pool.apply_async(extract_and_scrub, (path,)) for path in paths]
+        for i, job in enumerate(jobs):
+            try:
+                results[i] = job.get()
+            except Exception as e:  # including WorkerLostError if a PDF library crashes the worker
+                # errors raised in the pool's own process (time limits) arrive wrapped
+                e = e.exc if isinstance(e, ExceptionWithTraceback) else e
+                if isinstance(e, TimeLimitExceeded):
+                    e = TimeoutError(f"Extraction timed out after {timeout:g}s")
+                results[i] = e
+    finally:
+        # A stuck pdfplumber call never returns, so close() + join() could hang on it.
+        pool.terminate()
+        pool.join()
+    return results
@@ -1,6 +1,9 @@
 # backend/core/herd.py
 import re
-from collections import Counter
+
+import numpy as np
+from scipy import sparse
+from sklearn.feature_extraction.text import CountVectorizer
 
 STOPWORDS = set("""
 a an the and or but if then than to of in on for with by from as at is are was were be been being
@@ -9,25 +12,75 @@ this that these those it its we our you your they their i me my
 
 WORD_RE = re.compile(r"[a-zA-Z][a-zA-Z\-]+")
 
+# Bump when tokenization changes so cached per-document counts are recomputed.
+HERD_VERSION = "bigrams_v1"
+
 def tokenize(text: str):
     return [w.lower() for w in WORD_RE.findall(text) if w.lower() not in STOPWORDS]
 
 def bigrams(tokens):
     return [" ".join([tokens[i], tokens[i+1]]) for i in range(len(tokens)-1)]
 
-def herd_phrases(texts: list[str], top_n: int = 30):
-    phrase_counts = Counter()
-    doc_freq = Counter()
+def _vectorizer() -> CountVectorizer:
+    # Same tokens as `tokenize` (stopwords dropped before pairing), counted as bigrams.
+    return CountVectorizer(
+        token_pattern=WORD_RE.pattern,
+        lowercase=True,
+        stop_words=sorted(STOPWORDS),
+        ngram_range=(2, 2),
+        dtype=np.int32,
+    )
 
-    for t in texts:
-        toks = tokenize(t)
-        bs = bigrams(toks)
-        phrase_counts.update(bs)
-        for p in set(bs):
-            doc_freq[p] += 1
+def _fit(texts: list[str]):
+    """Sparse document-by-bigram count matrix and its column labels (None if no bigrams)."""
+    vec = _vectorizer()
+    try:
+        X = vec.fit_transform(texts).tocsr()
+    except ValueError:  # empty vocabulary: no document has two consecutive tokens
+        return None, []
+    return X, vec.get_feature_names_out().tolist()
 
-    top = phrase_counts.most_common(top_n)
+def _top(phrases: list[str], X, top_n: int):
+    counts = np.asarray(X.sum(axis=0)).ravel()
+    doc_freq = X.getnnz(axis=0)
+    top = np.lexsort((np.array(phrases, dtype=object), -counts))[:top_n]  # count desc, then alphabetical
     return [
-        {"phrase": p, "count": int(c), "doc_freq": int(doc_freq[p])}
-        for p, c in top
+        {"phrase": phrases[j], "count": int(counts[j]), "doc_freq": int(doc_freq[j])}
+        for j in top
     ]
+
+def doc_bigram_counts(texts: list[str]) -> list[dict[str, int]]:
+    """Per-document {bigram: count}, the cacheable unit for herd phrases."""
+    out: list[dict[str, int]] = [{} for _ in texts]
+    nonempty = [i for i, t in enumerate(texts) if t]
+    X, names = _fit([texts[i] for i in nonempty]) if nonempty else (None, [])
+    if X is None:
+        return out
+    for row, i in enumerate(nonempty):
+        lo, hi = X.indptr[row], X.indptr[row + 1]
+        out[i] = dict(zip(map(names.__getitem__, X.indices[lo:hi].tolist()), X.data[lo:hi].tolist()))
+    return out
+
+def herd_phrases_from_counts(rows: list[dict[str, int]], top_n: int = 30):
+    """Merge cached per-document counts: totals and document frequencies are column sums."""
+    vocab: dict[str, int] = {}
+    indptr = [0]
+    indices: list[int] = []
+    data: list[int] = []
+    for row in rows:
+        for p, c in row.items():
+            indices.append(vocab.setdefault(p, len(vocab)))
+            data.append(c)
+        indptr.append(len(indices))
+    if not vocab:
+        return []
+
+    X = sparse.csr_matrix(
+        (np.asarray(data, dtype=np.int64), np.asarray(indices, dtype=np.int64), np.asarray(indptr)),
+        shape=(len(rows), len(vocab)),
+    )
+    return _top(list(vocab), X, top_n)
+
+def herd_phrases(texts: list[str], top_n: int = 30):
+    X, names = _fit([t for t in texts if t]) if any(texts) else (None, [])
+    return [] if X is None else _top(names, X, top_n)
@@ -0,0 +1,75 @@
+# backend/core/incremental.py
+from __future__ import annotations
+
+import numpy as np
+
+from core.models import AnalysisRun, DocEmbedding, DocProjection
+from core.umap_project import place_new_points
+from core.vectors import COLUMNS, decode
+
+
+def incremental_parent(run: AnalysisRun) -> AnalysisRun | None:
+    """The run whose results `run` may reuse, or None if it has to start from scratch."""
+    parent = run.parent_run
+    if run.mode != "incremental" or parent is None or parent.status != "done":
+        return None
+    # Vectors are only comparable within the same model and chunking.
+    if (parent.embedding_model, parent.chunking_version) != (run.embedding_model, run.chunking_version):
+        return None
+    return parent
+
+
+def reusable_vectors(
+    parent: AnalysisRun, section: str, doc_ids: list[int], hashes: list[str]
+) -> dict[int, np.ndarray]:
+    """Parent vectors for documents whose section text is unchanged, by document id."""
+    wanted = dict(zip(doc_ids, hashes))
+    rows = DocEmbedding.objects.filter(run=parent, section=section, document_id__in=doc_ids).values_list(
+        "document_id", "text_sha256", *COLUMNS[parent.vector_storage]
+    )
+    # a compact parent yields its dequantized vectors; the child re-stores them in its own mode
+    return {d: decode(parent.vector_storage, *stored) for d, h, *stored in rows if h and wanted.get(d) == h}
+
+
+def place_in_parent_layout(
+    parent: AnalysisRun,
+    section: str,
+    doc_ids: list[int],
+    V: np.ndarray,
+    fresh_idx: list[int],
+    n_neighbors: int,
+) -> tuple[np.ndarray, np.ndarray, np.ndarray] | None:
+    """Keep the parent's coordinates for unchanged documents and place the rest around them.
+
+    Returns (coords, labels, outlier) aligned with `doc_ids`, or None when the
+    parent has too few points in this section to anchor a layout.
+    """
+    prev = {
+        d: (x, y, lab, sc)
+        for d, x, y, lab, sc in DocProjection.objects.filter(run=parent, section=section).values_list(
+            "document_id", "x", "y", "cluster_id", "outlier_score"
+        )
+    }
+    fresh = set(fresh_idx)
+    ref_idx = [i for i, d in enumerate(doc_ids) if i not in fresh and d in prev]
+    if len(ref_idx) < 5:
+        return None
+    # documents reused from the parent but missing a parent projection get placed too
+    ref_set = set(ref_idx)
+    new_idx = [i for i in range(len(doc_ids)) if i not in ref_set]
+
+    coords = np.empty((len(doc_ids), 2), dtype=np.float32)
+    labels = np.empty(len(doc_ids), dtype=int)
+    outlier = np.empty(len(doc_ids), dtype=np.float32)
+    for i in ref_idx:
+        x, y, lab, sc = prev[doc_ids[i]]
+        coords[i] = (x, y)
+        labels[i] = -1 if lab is None else lab
+        outlier[i] = 0.0 if sc is None else sc
+
+    if new_idx:
+        c, lab, sc = place_new_points(
+            V[ref_idx], coords[ref_idx], labels[ref_idx], outlier[ref_idx], V[new_idx], n_neighbors
+        )
+        coords[new_idx], labels[new_idx], outlier[new_idx] = c, lab, sc
+    return coords, labels, outlier
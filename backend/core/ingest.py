@@ -0,0 +1,167 @@
+# backend/core/ingest.py
+"""Archive ingest: zip/tar members streamed to storage with content-hash dedupe.
+
+Each member is copied in chunks into a spooled temp file (memory up to
+INGEST_SPOOL_MAX_BYTES, disk beyond) while its sha256 is computed. Members
+whose hash is already in the cohort, or earlier in the same archive, are
+skipped before anything is written to storage. Uploaded archives larger than
+FILE_UPLOAD_MAX_MEMORY_SIZE are already on disk, so nothing holds a whole
+archive in memory.
+
+Members' uncompressed sizes count against INGEST_MAX_TOTAL_BYTES before they
+are read: a zip's whole central directory up front, a tar stream's headers as
+they come. A unique constraint on (cohort_key, content_sha256) settles
+concurrent uploads of the same bytes; the loser's copy is reported as a
+duplicate and removed from storage.
+"""
+from __future__ import annotations
+
+import hashlib
+import mimetypes
+import tarfile
+import tempfile
+import zipfile
+from pathlib import PurePosixPath
+from typing import IO, Iterator
+
+from django.conf import settings
+from django.core.files import File
+from django.core.files.storage import default_storage
+from django.db import transaction
+
+from core.models import Document
+
+SUPPORTED_SUFFIXES = {".pdf", ".docx", ".txt"}  # what core.text_extract can read
+CHUNK = 1024 * 1024
+
+
+class ArchiveError(ValueError):
+    pass
+
+
+def hash_and_spool(src: IO[bytes], max_bytes: int) -> tuple[str, tempfile.SpooledTemporaryFile]:
+    """Copy `src` into a spooled temp file, returning (sha256 hex, file rewound to 0)."""
+    digest = hashlib.sha256()
+    out = tempfile.SpooledTemporaryFile(max_size=settings.INGEST_SPOOL_MAX_BYTES)
+    size = 0
+    while chunk := src.read(CHUNK):
+        size += len(chunk)
+        if size > max_bytes:
+            out.close()
+            raise ArchiveError(f"larger than {max_bytes} bytes")
+        digest.update(chunk)
+        out.write(chunk)
+    out.seek(0)
+    return digest.hexdigest(), out
+
+
+def _check_total(total: int) -> None:
+    if total > settings.INGEST_MAX_TOTAL_BYTES:
+        raise ArchiveError(f"more than {settings.INGEST_MAX_TOTAL_BYTES} bytes uncompressed")
+
+
+def _iter_members(archive: IO[bytes]) -> Iterator[tuple[str, IO[bytes]]]:
+    """(member path, readable stream) for every regular file in a zip or tar archive.
+
+    Raises ArchiveError once the members' declared sizes pass INGEST_MAX_TOTAL_BYTES,
+    before the member that crosses it is read. zipfile and tarfile never return
+    more than a member's declared size.
+    """
+    if zipfile.is_zipfile(archive):
+        archive.seek(0)
+        with zipfile.ZipFile(archive) as zf:
+            infos = [info for info in zf.infolist() if not info.is_dir()]
+            _check_total(sum(info.file_size for info in infos))
+            for info in infos:
+                with zf.open(info) as fh:
+                    yield info.filename, fh
+        return
+    archive.seek(0)
+    try:
+        tf = tarfile.open(fileobj=archive, mode="r|*")  # stream mode: members read in order, no seeking
+    except tarfile.TarError as e:
+        raise ArchiveError("not a zip or tar archive") from e
+    total = 0
+    with tf:
+        for member in tf:
+            if member.isfile():
+                total += member.size
+                _check_total(total)
+                fh = tf.extractfile(member)
+                if fh is not None:
+                    yield member.name, fh
+
+
+def _skip_reason(path: str) -> str | None:
+    p = PurePosixPath(path)
+    if any(part.startswith(".") or part == "__MACOSX" for part in p.parts):
+        return "hidden or metadata file"
+    if p.suffix.lower() not in SUPPORTED_SUFFIXES:
+        return "unsupported file type"
+    return None
+
+
+def ingest_archive(cohort_key: str, archive: IO[bytes]) -> dict:
+    """Store new archive members and create their Documents in one bulk_create.
+
+    Returns {"documents": [...], "duplicates": [...], "skipped": [...]}.
+    """
+    known = set(
+        Document.objects.filter(cohort_key=cohort_key)
+        .exclude(content_sha256="")
+        .values_list("content_sha256", flat=True)
+    )
+    docs: list[Document] = []
+    duplicates: list[dict] = []
+    skipped: list[dict] = []
+    saved: dict[str, str] = {}  # stored path -> archive member path
+
+    try:
+        for n, (path, stream) in enumerate(_iter_members(archive)):
+            if n >= settings.INGEST_MAX_FILES:
+                raise ArchiveError(f"more than {settings.INGEST_MAX_FILES} files")
+            reason = _skip_reason(path)
+            if reason:
+                skipped.append({"name": path, "reason": reason})
+                continue
+            try:
+                sha, spooled = hash_and_spool(stream, settings.INGEST_MAX_FILE_BYTES)
+            except ArchiveError as e:
+                skipped.append({"name": path, "reason": str(e)})
+                continue
+            name = PurePosixPath(path).name
+            with spooled:
+                if sha in known:
+                    duplicates.append({"name": path, "content_sha256": sha})
+                    continue
+                known.add(sha)
+                stored_rel_path = default_storage.save(f"{cohort_key}/{name}", File(spooled, name=name))
+            saved[stored_rel_path] = path
+            docs.append(
+                Document(
+                    cohort_key=cohort_key,
+                    filename=name,
+                    original_filename=name,
+                    stored_name=stored_rel_path.split("/")[-1],
+                    content_type=mimetypes.guess_type(name)[0] or "",
+                    content_sha256=sha,
+                    file_path=stored_rel_path,
+                    status="uploaded",
+                )
+            )
+        with transaction.atomic():
+            # Rows that hit uniq_doc_cohort_sha256 lost a race with another upload of the same bytes.
+            Document.objects.bulk_create(docs, batch_size=1000, ignore_conflicts=True)
+            created = {d.file_path: d for d in Document.objects.filter(cohort_key=cohort_key, file_path__in=saved)}
+    except BaseException:
+        for p in saved:  # no Document points at these
+            default_storage.delete(p)
+        raise
+
+    for d in docs:
+        if d.file_path not in created:
+            duplicates.append({"name": saved[d.file_path], "content_sha256": d.content_sha256})
+            default_storage.delete(d.file_path)
+    docs = [created[d.file_path] for d in docs if d.file_path in created]
+
+    return {"documents": docs, "duplicates": duplicates, "skipped": skipped}
@@ -0,0 +1,108 @@
+# backend/core/knn.py
+from __future__ import annotations
+
+from collections import OrderedDict
+
+import numpy as np
+from django.db.models import F
+
+from core.models import Document, NeighborGraph
+
+_GRAPH_CACHE: OrderedDict[tuple[int, str], NeighborGraph] = OrderedDict()
+_GRAPH_CACHE_SIZE = 16
+
+
+def topk_cosine(V: np.ndarray, k: int, block_size: int = 1024) -> tuple[np.ndarray, np.ndarray]:
+    """Exact top-k cosine neighbours of every row of V (excluding itself).
+
+    Works over (block_size x block_size) tiles of the similarity matrix and
+    keeps a running top-k per row, so memory is O(block_size^2 + n*k) rather
+    than O(n^2). Returns (indices int32 (n, k), cosine distances float32 (n, k)),
+    nearest first.
+    """
+    n = V.shape[0]
+    k = max(0, min(k, n - 1))
+    X = V.astype(np.float32, copy=False)
+    X = X / (np.linalg.norm(X, axis=1, keepdims=True) + 1e-12)
+
+    idx_out = np.empty((n, k), dtype=np.int32)
+    dist_out = np.empty((n, k), dtype=np.float32)
+    if k == 0:
+        return idx_out, dist_out
+
+    for r0 in range(0, n, block_size):
+        R = X[r0:r0 + block_size]
+        m = R.shape[0]
+        best_s = np.full((m, k), -np.inf, dtype=np.float32)
+        best_i = np.full((m, k), -1, dtype=np.int64)
+
+        for c0 in range(0, n, block_size):
+            S = R @ X[c0:c0 + block_size].T
+            w = S.shape[1]
+            diag = np.arange(max(r0, c0), min(r0 + m, c0 + w))
+            S[diag - r0, diag - c0] = -np.inf  # never your own neighbour
+
+            cand_s = np.concatenate([best_s, S], axis=1)
+            cand_i = np.concatenate([best_i, np.broadcast_to(np.arange(c0, c0 + w), (m, w))], axis=1)
+            top = np.argpartition(-cand_s, k - 1, axis=1)[:, :k]
+            best_s = np.take_along_axis(cand_s, top, axis=1)
+            best_i = np.take_along_axis(cand_i, top, axis=1)
+
+        order = np.argsort(-best_s, axis=1, kind="stable")
+        idx_out[r0:r0 + m] = np.take_along_axis(best_i, order, axis=1)
+        dist_out[r0:r0 + m] = 1.0 - np.take_along_axis(best_s, order, axis=1)
+
+    return idx_out, dist_out
+
+
+def build_neighbor_graph(run_id: int, section: str, doc_ids: list[int], V: np.ndarray, k: int, block_size: int):
+    order = np.argsort(np.asarray(doc_ids, dtype=np.int64), kind="stable")  # lookups use searchsorted
+    ids = np.asarray(doc_ids, dtype=np.int64)[order]
+    idx, dist = topk_cosine(V[order], k, block_size)
+    return NeighborGraph.objects.create(
+        run_id=run_id,
+        section=section,
+        k=idx.shape[1],
+        doc_ids=ids.tobytes(),
+        neighbors=idx.tobytes(),
+        distances=dist.tobytes(),
+    )
+
+
+def _load_graph(run_id: int, section: str) -> NeighborGraph | None:
+    key = (run_id, section)
+    graph = _GRAPH_CACHE.get(key)
+    if graph is not None:
+        _GRAPH_CACHE.move_to_end(key)
+        return graph
+    graph = (
+        NeighborGraph.objects.filter(run_id=run_id, section=section)
+        .annotate(run_status=F("run__status"))
+        .first()
+    )
+    if graph is None:
+        return None  # not cached: the run may still be writing it
+    graph.ids = np.frombuffer(bytes(graph.doc_ids), dtype=np.int64)
+    graph.idx = np.frombuffer(bytes(graph.neighbors), dtype=np.int32).reshape(-1, graph.k)
+    graph.dist = np.frombuffer(bytes(graph.distances), dtype=np.float32).reshape(-1, graph.k)
+    if graph.run_status == "done":  # a retried stage may still replace the graph
+        _GRAPH_CACHE[key] = graph
+        if len(_GRAPH_CACHE) > _GRAPH_CACHE_SIZE:
+            _GRAPH_CACHE.popitem(last=False)
+    return graph
+
+
+def graph_neighbors(run_id: int, doc_id: int, section: str = "doc", k: int = 5) -> list[dict] | None:
+    """Neighbours from the run's precomputed graph; None if it can't answer (no graph, or k too big)."""
+    graph = _load_graph(run_id, section)
+    if graph is None or not 0 < k <= graph.k:
+        return None
+    row = int(np.searchsorted(graph.ids, doc_id))
+    if row >= len(graph.ids) or graph.ids[row] != doc_id:
+        return []
+    nbr_ids = [int(graph.ids[j]) for j in graph.idx[row, :k]]
+    names = dict(Document.objects.filter(id__in=nbr_ids).values_list("id", "filename"))
+    return [
+        {"id": d, "filename": names.get(d, ""), "cosine_distance": float(dist)}
+        for d, dist in zip(nbr_ids, graph.dist[row, :k])
+    ]
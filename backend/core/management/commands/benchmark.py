@@ -0,0 +1,175 @@
+# backend/core/management/commands/benchmark.py
+"""End-to-end benchmark on synthetic cohorts.
+
+Runs every pipeline stage in-process, then times the read paths: doc_detail
+neighbours (graph and SQL), batched neighbours, projection (JSON and packed)
+and tiles. Embeddings come from a hashing stub, so nothing is downloaded and
+numbers are comparable across commits. Needs the configured Postgres; the
+synthetic cohort is deleted afterwards unless --keep is given.
+
+    python manage.py benchmark --sizes 1000 10000 --queries 200 > bench.json
+"""
+from __future__ import annotations
+
+import json
+import shutil
+import subprocess
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+from django.core.management.base import BaseCommand, CommandError
+from django.test import Client, override_settings
+
+from core import embed, pipeline
+from core.knn import graph_neighbors
+from core.models import AnalysisRun, Document, EmbeddingCacheEntry
+from core.neighbor import nearest_documents, nearest_documents_batch
+from core.synthetic import synthetic_corpus
+
+STUB_MODEL = "stub/hashing-384"
+
+
+class HashingEmbedder:
+    """Stands in for a SentenceTransformer: unit-norm hashed word/bigram counts, no weights to load."""
+
+    tokenizer = None
+
+    def __init__(self, dim: int = 384):
+        from sklearn.feature_extraction.text import HashingVectorizer
+
+        self.dim = dim
+        self._vectorizer = HashingVectorizer(n_features=dim, ngram_range=(1, 2), alternate_sign=False)
+
+    def get_sentence_embedding_dimension(self) -> int:
+        return self.dim
+
+    def encode(self, texts, **kwargs) -> np.ndarray:
+        return self._vectorizer.transform(texts).toarray().astype(np.float32)
+
+
+def percentiles(samples_s: list[float]) -> dict:
+    ms = np.asarray(samples_s) * 1000
+    return {f"p{p}_ms": round(float(np.percentile(ms, p)), 2) for p in (50, 95, 99)}
+
+
+def timed(fn, args_list: list[tuple]) -> dict:
+    samples = []
+    for args in args_list:
+        t0 = time.perf_counter()
+        fn(*args)
+        samples.append(time.perf_counter() - t0)
+    return {"calls": len(samples), "per_sec": round(len(samples) / sum(samples), 1), **percentiles(samples)}
+
+
+def git_commit() -> str:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return ""
+
+
+class Command(BaseCommand):
+    help = "Benchmark the analysis pipeline and read endpoints on synthetic cohorts; prints JSON."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--sizes", type=int, nargs="+", default=[1000])
+        parser.add_argument("--queries", type=int, default=200)
+        parser.add_argument("--k", type=int, default=5)
+        parser.add_argument("--batch", type=int, default=50)
+        parser.add_argument("--engine", default="umap")
+        parser.add_argument("--seed", type=int, default=0)
+        parser.add_argument("--keep", action="store_true", help="keep the synthetic cohorts and runs")
+
+    def handle(self, *args, **opts):
+        embed.register_model(STUB_MODEL, HashingEmbedder(), pinned=True)
+        results = {"commit": git_commit(), "embedding_model": STUB_MODEL, "engine": opts["engine"], "sizes": {}}
+        try:
+            for n in opts["sizes"]:
+                results["sizes"][str(n)] = self.bench_size(n, opts)
+        finally:
+            if not opts["keep"]:
+                EmbeddingCacheEntry.objects.filter(embedding_model=STUB_MODEL).delete()
+        self.stdout.write(json.dumps(results, indent=2))
+
+    def bench_size(self, n: int, opts: dict) -> dict:
+        cohort = f"__bench_{n}__"
+        workdir = Path(tempfile.mkdtemp(prefix="cohortmap-bench-"))
+        try:
+            docs = []
+            for i, text in enumerate(synthetic_corpus(n, seed=opts["seed"])):
+                path = workdir / f"resume_{i}.txt"
+                path.write_text(text, encoding="utf-8")
+                docs.append(Document(cohort_key=cohort, filename=path.name, file_path=str(path)))
+            Document.objects.bulk_create(docs, batch_size=2000)
+            run = AnalysisRun.objects.create(
+                cohort_key=cohort,
+                embedding_model=STUB_MODEL,
+                umap_params={"n_neighbors": 15, "min_dist": 0.1, "metric": "cosine", "random_state": 42,
+                             "engine": opts["engine"]},
+                status="running",
+            )
+            return {"stages": self.run_pipeline(run.id), "reads": self.run_reads(run.id, opts)}
+        finally:
+            if not opts["keep"]:
+                Document.objects.filter(cohort_key=cohort).delete()
+                AnalysisRun.objects.filter(cohort_key=cohort).delete()
+            shutil.rmtree(workdir, ignore_errors=True)
+
+    def run_pipeline(self, run_id: int) -> dict:
+        out = {}
+
+        def stage(name, fn, *args):
+            stats, prof = {}, {}
+            t0 = time.perf_counter()
+            result = fn(*args, stats, prof)
+            seconds = time.perf_counter() - t0
+            items = stats.get("documents", 0)
+            out[name] = {
+                "seconds": round(seconds, 3),
+                "docs_per_sec": round(items / seconds, 1) if items and seconds else None,
+                **stats,
+                "steps": prof,
+            }
+            return result
+
+        # uploads are not extracting in the background here, so don't wait for them
+        with override_settings(EXTRACT_WAIT_TIMEOUT_S=0):
+            doc_ids = stage("extract", pipeline.extract_stage, run_id)
+        stage("herd", pipeline.herd_stage, run_id, doc_ids)
+        for section in pipeline.SECTIONS_FOR_VIEWS:
+            embedded = stage(f"embed:{section}", pipeline.embed_section, run_id, section, doc_ids)
+            stage(f"project:{section}", pipeline.project_section, run_id, section, embedded)
+        stage("finalize", pipeline.finalize_run, run_id, doc_ids)
+        return out
+
+    def run_reads(self, run_id: int, opts: dict) -> dict:
+        rng = np.random.default_rng(opts["seed"])
+        doc_ids = list(
+            Document.objects.filter(embeddings__run_id=run_id, embeddings__section="doc").values_list("id", flat=True)
+        )
+        sample = [int(d) for d in rng.choice(doc_ids, size=opts["queries"])]
+        k, batch = opts["k"], opts["batch"]
+        client = Client()
+
+        def get(url):
+            res = client.get(url, secure=True)  # SECURE_SSL_REDIRECT would answer plain http with a 301
+            if res.status_code != 200:
+                raise CommandError(f"GET {url} returned {res.status_code}")
+
+        tiles = [(z, int(rng.integers(0, 1 << z)), int(rng.integers(0, 1 << z))) for z in rng.integers(0, 6, 50)]
+        return {
+            "graph_neighbors": timed(graph_neighbors, [(run_id, d, "doc", k) for d in sample]),
+            "nearest_documents": timed(nearest_documents, [(run_id, d, "doc", k) for d in sample]),
+            "nearest_documents_batch": timed(
+                nearest_documents_batch,
+                [(run_id, sample[i:i + batch], "doc", k) for i in range(0, len(sample), batch)],
+            ),
+            "doc_detail_view": timed(get, [(f"/api/runs/{run_id}/doc/{d}/?k={k}",) for d in sample[:50]]),
+            "projection_json_view": timed(get, [(f"/api/runs/{run_id}/projection/?section=doc",)] * 10),
+            "projection_packed_view": timed(get, [(f"/api/runs/{run_id}/projection/?section=doc&format=packed",)] * 10),
+            "tile_view": timed(get, [(f"/api/runs/{run_id}/tiles/{z}/{x}/{y}/?section=doc",) for z, x, y in tiles]),
+        }
@@ -0,0 +1,66 @@
+# backend/core/management/commands/convert_vectors.py
+"""Re-store existing runs' embeddings in another vector storage mode.
+
+The migration path for runs written before AnalysisRun.vector_storage (all
+float32) or for switching a run later. New columns are filled in chunks while
+the old ones keep serving searches; one final transaction then switches the
+run over and clears the old columns.
+
+    python manage.py convert_vectors --to halfvec --all
+    python manage.py convert_vectors --to int8 --runs 12 15
+"""
+from __future__ import annotations
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from core import vectors
+from core.models import AnalysisRun, DocEmbedding
+
+
+def convert_run(run: AnalysisRun, target: str, chunk: int) -> int:
+    source = run.vector_storage
+    qs = DocEmbedding.objects.filter(run=run)
+    last_id, converted = 0, 0
+    while True:
+        batch = list(qs.filter(id__gt=last_id).order_by("id").only("id", *vectors.COLUMNS[source])[:chunk])
+        if not batch:
+            break
+        V = [vectors.decode(source, *(getattr(e, c) for c in vectors.COLUMNS[source])) for e in batch]
+        for e, stored in zip(batch, vectors.encode(target, V)):
+            for column, value in zip(vectors.COLUMNS[target], stored):
+                setattr(e, column, value)
+        DocEmbedding.objects.bulk_update(batch, vectors.COLUMNS[target])
+        last_id, converted = batch[-1].id, converted + len(batch)
+
+    with transaction.atomic():
+        qs.update(**{c: None for c in vectors.COLUMNS[source]})
+        AnalysisRun.objects.filter(id=run.id).update(vector_storage=target)
+    return converted
+
+
+class Command(BaseCommand):
+    help = "Convert stored run embeddings to another vector storage mode (float32, halfvec, int8)."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--to", required=True, choices=vectors.VECTOR_STORAGE_MODES)
+        parser.add_argument("--runs", type=int, nargs="+", default=[])
+        parser.add_argument("--all", action="store_true", help="every finished run not already in --to")
+        parser.add_argument("--chunk", type=int, default=2000)
+
+    def handle(self, *args, **opts):
+        target = opts["to"]
+        if opts["all"]:
+            runs = AnalysisRun.objects.filter(status="done").exclude(vector_storage=target).order_by("id")
+        elif opts["runs"]:
+            runs = AnalysisRun.objects.filter(id__in=opts["runs"]).order_by("id")
+        else:
+            raise CommandError("give --runs or --all")
+
+        for run in runs:
+            if run.status not in {"done", "failed"}:
+                raise CommandError(f"run {run.id} is {run.status}; convert it once it has finished")
+            if run.vector_storage == target:
+                continue
+            n = convert_run(run, target, opts["chunk"])
+            self.stdout.write(f"run {run.id}: {n} embeddings {run.vector_storage} -> {target}")
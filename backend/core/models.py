@@ -1,6 +1,8 @@
 # backend/core/models.py
 from django.db import models
-from pgvector.django import VectorField
+from django.contrib.postgres.indexes import OpClass
+from django.db.models.functions import Cast
+from pgvector.django import HalfVectorField, HnswIndex, VectorField
 
 SECTION_CHOICES = [
     ("doc", "Full Document"),
@@ -11,6 +13,9 @@ SECTION_CHOICES = [
     ("other", "Other"),
 ]
 
+# Embedding dimensions that get HNSW indexes (vector columns are dimensionless; see core/vectors.py)
+VECTOR_INDEX_DIMS = (384, 768, 1024)
+
 class AnalysisRun(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     cohort_key = models.CharField(max_length=200, default="default")
@@ -22,6 +27,15 @@ class AnalysisRun(models.Model):
     herd_phrases = models.JSONField(default=dict)  # e.g., {"bigrams":[{"phrase":"data analysis","count":42,"doc_freq":18}, ...]}
     label = models.CharField(max_length=200, blank=True, default="")
     parent_run = models.ForeignKey("self", null=True, blank=True, on_delete=models.SET_NULL, related_name="children")
+    mode = models.CharField(max_length=20, default="full")  # full/incremental (reuses parent_run's embeddings)
+    embed_cache_hits = models.IntegerField(default=0)
+    embed_cache_misses = models.IntegerField(default=0)
+    cluster_params = models.JSONField(default=dict)  # min_cluster_size, min_samples, algorithm, core_dist_n_jobs
+    stages = models.JSONField(default=dict)  # {"extract": {"status", "started_at", ...}, "embed:doc": {...}, ...}
+    profile = models.JSONField(default=dict)  # {stage: {step: {"seconds", "cpu_s", "rss_peak_mb", "items", ...}}}
+    projection_stats = models.JSONField(default=dict)  # {section: {"engine", "n", "seconds", "rss_peak_mb", ...}}
+    vector_storage = models.CharField(max_length=10, default="float32")  # float32/halfvec/int8 (core/vectors.py)
+    embedding_dim = models.IntegerField(default=384)  # taken from the model's output when the run embeds
 
 class Document(models.Model):
     cohort_key = models.CharField(max_length=128, db_index=True)
@@ -33,24 +47,85 @@ class Document(models.Model):
     stored_name = models.CharField(max_length=512, blank=True, default="")
 
     content_type = models.CharField(max_length=128, blank=True, default="")
+    content_sha256 = models.CharField(max_length=64, blank=True, default="")  # of the uploaded bytes; dedupe key
     file_path = models.TextField()  # absolute path you already use
     status = models.CharField(max_length=32, default="uploaded")
+    claimed_at = models.DateTimeField(null=True, blank=True)  # when status became "extracting"; stale claims are retaken
     created_at = models.DateTimeField(auto_now_add=True)
     raw_text = models.TextField(blank=True, default="")
     scrubbed_text = models.TextField(blank=True, default="")
     error = models.TextField(blank=True, default="")
+    sections = models.JSONField(default=dict, blank=True)  # chunk_sections(scrubbed_text), cached
+    sections_version = models.CharField(max_length=50, blank=True, default="")  # chunking_version of `sections`
+    herd_bigrams = models.JSONField(default=dict, blank=True)  # {"version": HERD_VERSION, "counts": {bigram: n}}
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["cohort_key", "content_sha256"], name="doc_cohort_sha256_idx"),
+            # status-filtered document lists, newest first (core/pagination.py)
+            models.Index(fields=["cohort_key", "status", "created_at"], name="doc_cohort_status_created_idx"),
+        ]
+        constraints = [
+            # one Document per content hash per cohort, so concurrent uploads of the same bytes can't both land
+            models.UniqueConstraint(
+                fields=["cohort_key", "content_sha256"],
+                condition=~models.Q(content_sha256=""),
+                name="uniq_doc_cohort_sha256",
+            )
+        ]
 
 class DocEmbedding(models.Model):
     document = models.ForeignKey("Document", on_delete=models.CASCADE, related_name="embeddings")
     run = models.ForeignKey("AnalysisRun", on_delete=models.CASCADE, related_name="embeddings")
     section = models.CharField(max_length=20, choices=SECTION_CHOICES, default="doc")
-    vector = VectorField(dimensions=384)
+    # exactly one representation is set, per run.vector_storage
+    dim = models.IntegerField(default=384)
+    vector = VectorField(null=True, blank=True)
+    half_vector = HalfVectorField(null=True, blank=True)
+    int8_vector = models.BinaryField(null=True, blank=True)
+    int8_scale = models.FloatField(null=True, blank=True)
     norm = models.FloatField(default=0.0)
+    text_sha256 = models.CharField(max_length=64, blank=True, default="")  # section text the vector was built from
 
     class Meta:
         constraints = [
             models.UniqueConstraint(fields=["document", "run", "section"], name="uniq_embedding_doc_run_section")
         ]
+        # ANN indexes for `<=>`: HNSW needs a fixed dimension, so each one casts the column for a
+        # single `dim`. Queries filter by run/section and rely on hnsw.iterative_scan (core/neighbor.py).
+        indexes = [models.Index(fields=["run", "section"], name="docemb_run_section_idx")] + [
+            HnswIndex(
+                OpClass(Cast(column, field(dimensions=dim)), name=opclass),
+                name=f"docemb_{tag}_{dim}_hnsw",
+                condition=models.Q(dim=dim),
+                m=16,
+                ef_construction=64,
+            )
+            for column, field, opclass, tag in [
+                ("vector", VectorField, "vector_cosine_ops", "f32"),
+                ("half_vector", HalfVectorField, "halfvec_cosine_ops", "f16"),
+            ]
+            for dim in VECTOR_INDEX_DIMS
+        ]
+
+
+class EmbeddingCacheEntry(models.Model):
+    # Content-addressed: same model + chunking + section + text => same vector, across runs.
+    embedding_model = models.CharField(max_length=200)
+    chunking_version = models.CharField(max_length=50)
+    section = models.CharField(max_length=20, choices=SECTION_CHOICES, default="doc")
+    text_sha256 = models.CharField(max_length=64)
+    vector = VectorField()  # full precision whatever the run stores, so every storage mode can reuse it
+    created_at = models.DateTimeField(auto_now_add=True)
+    last_used_at = models.DateTimeField(auto_now=True, db_index=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["embedding_model", "chunking_version", "section", "text_sha256"],
+                name="uniq_embedding_cache_key",
+            )
+        ]
 
 
 class DocProjection(models.Model):
@@ -67,6 +142,81 @@ class DocProjection(models.Model):
             models.UniqueConstraint(fields=["document", "run", "section"], name="uniq_projection_doc_run_section")
         ]
 
+class NeighborGraph(models.Model):
+    # Top-k cosine neighbours per document for one run/section, as packed little-endian arrays:
+    # doc_ids int64 (n,) sorted; neighbors int32 (n, k) row positions into doc_ids; distances float32 (n, k).
+    run = models.ForeignKey("AnalysisRun", on_delete=models.CASCADE, related_name="neighbor_graphs")
+    section = models.CharField(max_length=20, choices=SECTION_CHOICES, default="doc")
+    k = models.IntegerField()
+    doc_ids = models.BinaryField()
+    neighbors = models.BinaryField()
+    distances = models.BinaryField()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["run", "section"], name="uniq_neighbor_graph_run_section")
+        ]
+
+class ClusterTree(models.Model):
+    # HDBSCAN single-linkage tree for a run/section, so clusters can be re-cut without a refit.
+    run = models.ForeignKey("AnalysisRun", on_delete=models.CASCADE, related_name="cluster_trees")
+    section = models.CharField(max_length=20, choices=SECTION_CHOICES, default="doc")
+    params = models.JSONField(default=dict)  # resolved HDBSCAN settings the tree was built with
+    doc_ids = models.BinaryField()  # int64 (n,), tree leaf i is doc_ids[i]
+    tree = models.BinaryField()  # float64 (n-1, 4): left, right, distance, size
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["run", "section"], name="uniq_cluster_tree_run_section")
+        ]
+
+
+class ProjectionTileIndex(models.Model):
+    # Where a run/section's tile pyramid sits in projection space (see core/tiles.py).
+    run = models.ForeignKey("AnalysisRun", on_delete=models.CASCADE, related_name="tile_indexes")
+    section = models.CharField(max_length=20, choices=SECTION_CHOICES, default="doc")
+    min_x = models.FloatField()
+    min_y = models.FloatField()
+    extent = models.FloatField()
+    max_zoom = models.IntegerField()
+    tile_capacity = models.IntegerField()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["run", "section"], name="uniq_tile_index_run_section")
+        ]
+
+
+class ProjectionTile(models.Model):
+    run = models.ForeignKey("AnalysisRun", on_delete=models.CASCADE, related_name="tiles")
+    section = models.CharField(max_length=20, choices=SECTION_CHOICES, default="doc")
+    zoom = models.IntegerField()
+    x = models.IntegerField()
+    y = models.IntegerField()
+    count = models.IntegerField()  # points under this tile before thinning
+    points = models.JSONField(default=list)  # [[document_id, x, y, cluster_id, weight], ...]
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["run", "section", "zoom", "x", "y"], name="uniq_tile_run_section_zxy")
+        ]
+
+
+class DeletionJob(models.Model):
+    # Background cohort deletion (core/deletion.py); the DELETE endpoint returns its id.
+    cohort_key = models.CharField(max_length=200)
+    status = models.CharField(max_length=20, default="queued")  # queued/running/done/failed
+    actor = models.CharField(max_length=200, blank=True, default="")
+    created_at = models.DateTimeField(auto_now_add=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+    files_total = models.IntegerField(default=0)
+    files_deleted = models.IntegerField(default=0)
+    file_errors = models.IntegerField(default=0)
+    documents_deleted = models.IntegerField(default=0)
+    runs_deleted = models.IntegerField(default=0)
+    error = models.TextField(blank=True, default="")
+
+
 # backend/core/models.py
 class AuditEvent(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
@@ -1,21 +1,170 @@
 # backend/core/neighbor.py
 from __future__ import annotations
-from django.db import connection
+
+from collections import OrderedDict
+
+import numpy as np
+from django.conf import settings
+from django.db import connection, transaction
+
+from core.models import AnalysisRun, DocEmbedding, Document
+
+# pgvector column and type per AnalysisRun.vector_storage; int8 has no pgvector type and is scanned in numpy
+_SQL_VECTOR = {"float32": ("vector", "vector"), "halfvec": ("half_vector", "halfvec")}
+
+# (run id, section) -> (document ids, int8 codes, 1 / row norm); LRU, bounded by INT8_CACHE_MAX_BYTES
+_INT8_CACHE: OrderedDict[tuple[int, str], tuple[np.ndarray, np.ndarray, np.ndarray]] = OrderedDict()
+_INT8_QUERY_GROUP = 64  # query rows scored together: a (group x n) float32 block
+_INT8_SCAN_BLOCK = 8192  # stored rows dequantized at a time
+
+
+def _tune_hnsw(cur) -> None:
+    # SET LOCAL only lasts for the surrounding transaction.
+    cur.execute("SELECT set_config('hnsw.ef_search', %s, true)", [str(settings.HNSW_EF_SEARCH)])
+    if settings.HNSW_ITERATIVE_SCAN:
+        cur.execute("SELECT set_config('hnsw.iterative_scan', %s, true)", [settings.HNSW_ITERATIVE_SCAN])
+
+
+def _vector_sql(run: AnalysisRun, alias: str) -> str:
+    # Cast to the run's fixed dimension: together with `dim = N` this matches the partial HNSW
+    # expression index for N (models.DocEmbedding). Both parts come from the database, never the request.
+    column, pg_type = _SQL_VECTOR[run.vector_storage]
+    return f"({alias}.{column}::{pg_type}({int(run.embedding_dim)}))"
+
+
+def _storage(run_id: int) -> AnalysisRun:
+    return AnalysisRun.objects.only("vector_storage", "embedding_dim", "status").get(id=run_id)
+
+
+def _cache_int8(key: tuple[int, str], entry: tuple[np.ndarray, ...]) -> None:
+    _INT8_CACHE[key] = entry
+    used = sum(a.nbytes for e in _INT8_CACHE.values() for a in e)
+    while _INT8_CACHE and used > settings.INT8_CACHE_MAX_BYTES:
+        _, evicted = _INT8_CACHE.popitem(last=False)
+        used -= sum(a.nbytes for a in evicted)
+
+
+def _int8_matrix(run: AnalysisRun, section: str) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """(document ids, int8 codes (n, d), 1 / row norm) for an int8 run; the per-row scale cancels out of cosine.
+
+    The codes stay int8 (a quarter of float32) and are dequantized a block at a time per query.
+    """
+    key = (run.id, section)
+    hit = _INT8_CACHE.get(key)
+    if hit is not None:
+        _INT8_CACHE.move_to_end(key)
+        return hit
+    rows = list(
+        DocEmbedding.objects.filter(run_id=run.id, section=section)
+        .order_by("document_id")
+        .values_list("document_id", "int8_vector")
+    )
+    ids = np.fromiter((d for d, _ in rows), dtype=np.int64, count=len(rows))
+    codes = np.frombuffer(b"".join(bytes(q) for _, q in rows), dtype=np.int8).reshape(len(rows), -1)
+    inv_norm = np.empty(len(rows), dtype=np.float32)
+    for start in range(0, len(rows), _INT8_SCAN_BLOCK):
+        block = codes[start:start + _INT8_SCAN_BLOCK].astype(np.float32)
+        inv_norm[start:start + _INT8_SCAN_BLOCK] = 1.0 / (np.linalg.norm(block, axis=1) + 1e-12)
+    if run.status == "done":  # earlier stages may still be writing rows
+        _cache_int8(key, (ids, codes, inv_norm))
+    return ids, codes, inv_norm
+
+
+def _int8_nearest(run: AnalysisRun, doc_ids: list[int], section: str, k: int) -> dict[int, list[dict]]:
+    ids, codes, inv_norm = _int8_matrix(run, section)
+    rows = np.searchsorted(ids, doc_ids)
+    found = [(d, int(r)) for d, r in zip(doc_ids, rows) if r < len(ids) and ids[r] == d]
+    out: dict[int, list[tuple[int, float]]] = {}
+    k = max(0, min(k, len(ids) - 1))
+    for g in range(0, len(found), _INT8_QUERY_GROUP):
+        group = found[g:g + _INT8_QUERY_GROUP]
+        q_rows = np.array([r for _, r in group])
+        Q = codes[q_rows].astype(np.float32) * inv_norm[q_rows, None]
+        sims = np.empty((len(group), len(ids)), dtype=np.float32)
+        for start in range(0, len(ids), _INT8_SCAN_BLOCK):
+            block = codes[start:start + _INT8_SCAN_BLOCK].astype(np.float32)
+            sims[:, start:start + _INT8_SCAN_BLOCK] = (Q @ block.T) * inv_norm[start:start + _INT8_SCAN_BLOCK]
+        for i, (d, r) in enumerate(group):
+            if k == 0:
+                out[d] = []
+                continue
+            dist = 1.0 - sims[i]
+            dist[r] = np.inf  # never your own neighbour
+            top = np.argpartition(dist, k - 1)[:k]
+            top = top[np.argsort(dist[top], kind="stable")]
+            out[d] = [(int(ids[j]), float(dist[j])) for j in top]
+    names = dict(
+        Document.objects.filter(id__in={n for nn in out.values() for n, _ in nn}).values_list("id", "filename")
+    )
+    return {
+        d: [{"id": n, "filename": names.get(n, ""), "cosine_distance": dist} for n, dist in out.get(d, [])]
+        for d in doc_ids
+    }
+
 
 def nearest_documents(run_id: int, doc_id: int, section: str = "doc", k: int = 5):
-    with connection.cursor() as cur:
+    run = _storage(run_id)
+    if run.vector_storage == "int8":
+        return _int8_nearest(run, [doc_id], section, k)[doc_id]
+    q_vec, e2_vec = _vector_sql(run, "q"), _vector_sql(run, "e2")
+    # Ordering by `vector <=> <constant>` is what lets the HNSW index serve this;
+    # a self-join comparing two columns always falls back to a sequential scan.
+    with transaction.atomic(), connection.cursor() as cur:
+        _tune_hnsw(cur)
         cur.execute(
-            """
-            SELECT d2.id, d2.filename, (e1.vector <=> e2.vector) AS cosine_distance
-            FROM core_docembedding e1
-            JOIN core_docembedding e2
-              ON e1.run_id = e2.run_id AND e1.section = e2.section
-            JOIN core_document d2 ON e2.document_id = d2.id
-            WHERE e1.run_id = %s AND e1.section = %s AND e1.document_id = %s AND e2.document_id <> %s
-            ORDER BY cosine_distance ASC
-            LIMIT %s;
+            f"""
+            WITH q AS (
+                SELECT {q_vec} AS v FROM core_docembedding q
+                WHERE run_id = %s AND section = %s AND document_id = %s
+            ),
+            nn AS MATERIALIZED (
+                SELECT e2.document_id, {e2_vec} <=> (SELECT v FROM q) AS cosine_distance
+                FROM core_docembedding e2
+                WHERE e2.run_id = %s AND e2.section = %s AND e2.dim = {int(run.embedding_dim)}
+                  AND e2.document_id <> %s
+                ORDER BY {e2_vec} <=> (SELECT v FROM q)
+                LIMIT %s
+            )
+            SELECT d2.id, d2.filename, nn.cosine_distance
+            FROM nn JOIN core_document d2 ON nn.document_id = d2.id
+            WHERE nn.cosine_distance IS NOT NULL
+            ORDER BY nn.cosine_distance ASC;
             """,
-            [run_id, section, doc_id, doc_id, k],
+            [run_id, section, doc_id, run_id, section, doc_id, k],
         )
         rows = cur.fetchall()
     return [{"id": r[0], "filename": r[1], "cosine_distance": float(r[2])} for r in rows]
+
+
+def nearest_documents_batch(run_id: int, doc_ids: list[int], section: str = "doc", k: int = 5):
+    """Top-k neighbours for many documents in one round trip, keyed by document id."""
+    out: dict[int, list[dict]] = {d: [] for d in doc_ids}
+    if not doc_ids:
+        return out
+    run = _storage(run_id)
+    if run.vector_storage == "int8":
+        return _int8_nearest(run, list(doc_ids), section, k)
+    q_vec, e2_vec = _vector_sql(run, "q"), _vector_sql(run, "e2")
+    with transaction.atomic(), connection.cursor() as cur:
+        _tune_hnsw(cur)
+        cur.execute(
+            f"""
+            SELECT q.document_id, d2.id, d2.filename, nn.cosine_distance
+            FROM core_docembedding q
+            CROSS JOIN LATERAL (
+                SELECT e2.document_id, {e2_vec} <=> {q_vec} AS cosine_distance
+                FROM core_docembedding e2
+                WHERE e2.run_id = q.run_id AND e2.section = q.section AND e2.dim = {int(run.embedding_dim)}
+                  AND e2.document_id <> q.document_id
+                ORDER BY {e2_vec} <=> {q_vec}
+                LIMIT %s
+            ) nn
+            JOIN core_document d2 ON nn.document_id = d2.id
+            WHERE q.run_id = %s AND q.section = %s AND q.document_id = ANY(%s)
+            ORDER BY q.document_id, nn.cosine_distance ASC;
+            """,
+            [k, run_id, section, list(doc_ids)],
+        )
+        for src, nid, filename, dist in cur.fetchall():
+            out[src].append({"id": nid, "filename": filename, "cosine_distance": float(dist)})
+    return out
@@ -0,0 +1,60 @@
+# backend/core/packing.py
+"""Columnar binary encoding for projection points.
+
+Layout (little-endian):
+    b"CSMP" | uint32 header_len | header JSON (space-padded to a multiple of 8) | columns
+
+The header lists each column's name and dtype in order; every column is n
+values stored back to back. Missing values: cluster_id is INT32_MIN,
+outlier_score is NaN. filename/status hold indexes into the header's
+"filenames"/"statuses" arrays.
+"""
+from __future__ import annotations
+
+import json
+import struct
+
+import numpy as np
+
+MAGIC = b"CSMP"
+VERSION = 1
+INT32_MIN = np.iinfo(np.int32).min
+
+
+def _intern(values: list[str]) -> tuple[list[str], np.ndarray]:
+    table: dict[str, int] = {}
+    idx = np.fromiter((table.setdefault(v, len(table)) for v in values), dtype=np.int32, count=len(values))
+    return list(table), idx
+
+
+def pack_projection(rows: list[tuple]) -> bytes:
+    """rows: (document_id, filename, status, x, y, cluster_id, outlier_score) tuples."""
+    n = len(rows)
+    doc_id, filename, status, x, y, cluster, outlier = zip(*rows) if rows else ((),) * 7
+
+    ids = np.asarray(doc_id, dtype=np.int64)
+    id_dtype = "int32" if n == 0 or ids.max() <= np.iinfo(np.int32).max else "int64"
+    filenames, filename_idx = _intern(list(filename))
+    statuses, status_idx = _intern(list(status))
+
+    columns = [
+        ("document_id", ids.astype(id_dtype)),
+        ("x", np.asarray(x, dtype=np.float32)),
+        ("y", np.asarray(y, dtype=np.float32)),
+        ("cluster_id", np.asarray([INT32_MIN if c is None else c for c in cluster], dtype=np.int32)),
+        ("outlier_score", np.asarray([np.nan if s is None else s for s in outlier], dtype=np.float32)),
+        ("filename", filename_idx),
+        ("status", status_idx),
+    ]
+    header = json.dumps({
+        "version": VERSION,
+        "n": n,
+        "columns": [{"name": name, "dtype": str(arr.dtype)} for name, arr in columns],
+        "filenames": filenames,
+        "statuses": statuses,
+    }).encode("utf-8")
+    header += b" " * (-(len(MAGIC) + 4 + len(header)) % 8)  # keep column buffers 8-byte aligned
+
+    parts = [MAGIC, struct.pack("<I", len(header)), header]
+    parts.extend(arr.astype(arr.dtype.newbyteorder("<"), copy=False).tobytes() for _, arr in columns)
+    return b"".join(parts)
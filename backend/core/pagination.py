@@ -0,0 +1,60 @@
+# backend/core/pagination.py
+"""Keyset pagination for the newest-first list endpoints.
+
+Pages are ordered by (-created_at, -id); the cursor is the last row's
+(created_at, id), base64-encoded, and the next page starts strictly after it.
+Unlike OFFSET, every page costs the same no matter how deep it is, and rows
+inserted meanwhile neither shift nor repeat earlier results.
+"""
+from __future__ import annotations
+
+import base64
+import json
+from datetime import datetime
+
+from django.conf import settings
+from django.db.models import Q, QuerySet
+
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+
+class CursorError(ValueError):
+    pass
+
+
+def encode_cursor(created_at: datetime, pk: int) -> str:
+    raw = json.dumps([created_at.isoformat(), pk]).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> tuple[datetime, int]:
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        created_at, pk = json.loads(raw)
+        return datetime.fromisoformat(created_at), int(pk)
+    except (ValueError, TypeError) as e:
+        raise CursorError("invalid cursor") from e
+
+
+def page_size(raw: str | None) -> int:
+    if not raw:
+        return settings.LIST_PAGE_SIZE
+    try:
+        n = int(raw)
+    except ValueError as e:
+        raise CursorError("limit must be an integer") from e
+    return max(1, min(n, settings.LIST_PAGE_MAX))
+
+
+def keyset_page(qs: QuerySet, cursor: str | None, limit: int) -> tuple[list, str | None]:
+    """One page of `qs` newest first, plus the cursor for the next page (None on the last)."""
+    qs = qs.order_by("-created_at", "-id")
+    if cursor:
+        created_at, pk = decode_cursor(cursor)
+        qs = qs.filter(Q(created_at__lt=created_at) | Q(created_at=created_at, id__lt=pk))
+    rows = list(qs[: limit + 1])
+    if len(rows) <= limit:
+        return rows, None
+    rows = rows[:limit]
+    last = rows[-1]
+    return rows, encode_cursor(last.created_at, last.id)
@@ -0,0 +1,364 @@
+# backend/core/pipeline.py
+"""Analysis stages, each a plain function over the database.
+
+core/tasks.py wires them into a Celery canvas:
+
+    extract -> [herd | embed:doc -> project:doc | embed:skills -> ...] -> finalize
+
+Stages hand each other only document ids; vectors and layouts go through
+the database, so any worker can pick up any stage. Every per-section stage
+first clears what an earlier attempt may have written for its section,
+which makes a retry safe. AnalysisRun.stages records progress per stage and
+AnalysisRun.profile the cost of each step inside it (core/profiling.py).
+Stage transitions and embedding progress are also published to Redis for
+live clients (core/progress.py).
+"""
+from __future__ import annotations
+
+from datetime import timedelta
+
+import numpy as np
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from core.models import (
+    AnalysisRun,
+    Document,
+    DocEmbedding,
+    DocProjection,
+    NeighborGraph,
+    ClusterTree,
+    ProjectionTile,
+    ProjectionTileIndex,
+)
+from core.extract_pool import extract_many
+from core.embed_cache import cached_embed_texts, evict_embedding_cache, text_sha256
+from core.incremental import incremental_parent, reusable_vectors, place_in_parent_layout
+from core.umap_project import project_umap, fit_clusters, cluster_params_for
+from core.chunking import chunk_sections
+from core.herd import HERD_VERSION, doc_bigram_counts, herd_phrases_from_counts
+from core.bulk import write_embeddings, write_projections
+from core.knn import build_neighbor_graph
+from core.cluster_tree import store_cluster_tree
+from core.tiles import store_tiles
+from core.profiling import stage
+from core.vectors import load_vectors
+from core import progress
+
+SECTIONS_FOR_VIEWS = ["doc", "skills", "experience"]  # keep small for now
+
+EXTRACTED_FIELDS = [
+    "raw_text", "scrubbed_text", "status", "claimed_at", "error", "sections", "sections_version", "herd_bigrams"
+]
+EXTRACTABLE = {"uploaded", "failed"}
+PENDING_EXTRACTION = {"uploaded", "extracting"}
+
+
+def _stale_claim() -> Q:
+    cutoff = timezone.now() - timedelta(seconds=settings.EXTRACT_CLAIM_STALE_S)
+    return Q(status="extracting") & (Q(claimed_at__lt=cutoff) | Q(claimed_at__isnull=True))
+
+
+def claim_for_extraction(doc_ids: list[int]) -> list[int]:
+    # Conditional UPDATE so an upload task and a run never extract the same document twice.
+    with transaction.atomic():
+        ids = list(
+            Document.objects.select_for_update(skip_locked=True)
+            .filter(Q(status__in=EXTRACTABLE) | _stale_claim(), id__in=doc_ids)
+            .values_list("id", flat=True)
+        )
+        Document.objects.filter(id__in=ids).update(status="extracting", claimed_at=timezone.now())
+    return ids
+
+
+def release_claims(doc_ids: list[int], reason: str) -> None:
+    """Mark claimed documents whose extraction was interrupted as failed, so the next attempt retakes them."""
+    Document.objects.filter(id__in=doc_ids, status="extracting").update(
+        status="failed", error=f"extraction interrupted: {reason}", claimed_at=None
+    )
+
+
+def apply_extraction(d: Document, res) -> None:
+    if isinstance(res, Exception):
+        d.status = "failed"
+        d.error = str(res)
+    else:
+        d.raw_text, d.scrubbed_text = res
+        d.status = "extracted"
+        d.error = ""
+    d.claimed_at = None
+    d.sections = {}  # text changed: cached chunks and bigram counts are stale
+    d.sections_version = ""
+    d.herd_bigrams = {}
+
+
+def _ensure_sections(docs: list[Document], chunking_version: str) -> None:
+    # Chunk each document once for all sections; reuse the stored result while the version matches.
+    stale = [d for d in docs if d.sections_version != chunking_version]
+    for d in stale:
+        d.sections = chunk_sections((d.scrubbed_text or "")[:20000])  # guard
+        d.sections_version = chunking_version
+    Document.objects.bulk_update(stale, ["sections", "sections_version"], batch_size=500)
+
+
+def _ensure_herd_bigrams(docs: list[Document]) -> None:
+    # `docs` come without scrubbed_text: only documents whose cached counts are stale need it.
+    stale = [d for d in docs if d.herd_bigrams.get("version") != HERD_VERSION]
+    texts = dict(Document.objects.filter(id__in=[d.id for d in stale]).values_list("id", "scrubbed_text"))
+    counts = doc_bigram_counts([texts.get(d.id) or "" for d in stale])
+    for d, c in zip(stale, counts):
+        d.herd_bigrams = {"version": HERD_VERSION, "counts": c}
+    Document.objects.bulk_update(stale, ["herd_bigrams"], batch_size=500)
+
+
+def extraction_pending(run_id: int) -> bool:
+    """Whether upload-time extraction (extract_document) is still due or running for the run's cohort."""
+    cohort_key = AnalysisRun.objects.filter(id=run_id).values_list("cohort_key", flat=True).first()
+    if cohort_key is None:
+        return False  # deleted with its cohort
+    pending = Document.objects.filter(cohort_key=cohort_key, status__in=PENDING_EXTRACTION)
+    return pending.exclude(_stale_claim()).exists()
+
+
+def _merge_json(run_id: int, field: str, key: str, value) -> None:
+    # Sections finish on different workers; lock the row so their updates don't overwrite each other.
+    with transaction.atomic():
+        run = AnalysisRun.objects.select_for_update().filter(id=run_id).first()
+        if run is None:
+            return  # deleted with its cohort
+        getattr(run, field)[key] = value
+        run.save(update_fields=[field])
+
+
+def mark_stage(run_id: int, name: str, status: str, **detail) -> None:
+    now = timezone.now().isoformat()
+    entry = {"status": status, **detail}
+    entry["started_at" if status == "running" else "finished_at"] = now
+    with transaction.atomic():
+        run = AnalysisRun.objects.select_for_update().filter(id=run_id).first()
+        if run is None:
+            return
+        if status != "running":
+            entry = {**run.stages.get(name, {}), **entry}
+        run.stages[name] = entry
+        run.save(update_fields=["stages"])
+    progress.stage_event(run_id, name, status, **detail)
+
+
+def record_profile(run_id: int, stage_name: str, prof: dict) -> None:
+    _merge_json(run_id, "profile", stage_name, prof)
+
+
+def start_run(run_id: int) -> bool:
+    """Queued -> running; False if the run was cancelled (cohort deletion) or deleted before it started."""
+    started = AnalysisRun.objects.filter(id=run_id, status__in=("pending", "queued")).update(
+        status="running", error="", stages={}, profile={}
+    )
+    if started:
+        progress.publish(run_id, type="run", status="running")
+    return bool(started)
+
+
+def run_cancelled(run_id: int) -> bool:
+    """The run is gone or already failed: its remaining stages have nothing to do."""
+    return not AnalysisRun.objects.filter(id=run_id).exclude(status="failed").exists()
+
+
+def extract_stage(run_id: int, stats: dict, prof: dict) -> list[int]:
+    """Extract whatever the upload tasks have not, chunk, and clear earlier results. Returns usable doc ids."""
+    run = AnalysisRun.objects.get(id=run_id)
+    if not Document.objects.filter(cohort_key=run.cohort_key).exists():
+        raise RuntimeError("No documents found for cohort_key")
+
+    # Extraction normally happens at upload time (extract_document); tasks.extract_stage has
+    # already given in-flight uploads a chance to finish, so pick up whatever is left.
+    docs = list(Document.objects.filter(cohort_key=run.cohort_key).order_by("id"))
+
+    claimed = set(claim_for_extraction([d.id for d in docs if d.status in EXTRACTABLE | {"extracting"}]))
+    to_extract = [d for d in docs if d.id in claimed]
+    try:
+        with stage(prof, "extract", items=len(to_extract)):
+            results = extract_many(
+                [d.file_path for d in to_extract],
+                workers=settings.EXTRACT_WORKERS,
+                timeout=settings.EXTRACT_TIMEOUT_S,
+            )
+        for d, res in zip(to_extract, results):
+            apply_extraction(d, res)
+        with stage(prof, "db_write", items=len(to_extract)):
+            Document.objects.bulk_update(to_extract, EXTRACTED_FIELDS, batch_size=500)
+    except BaseException as e:
+        # give this attempt's claims back, or the stage's retry would wait on them and then skip them
+        release_claims(list(claimed), repr(e))
+        raise
+
+    # anything still extracting (or claimed by an upload task meanwhile) waits for the next run
+    docs_ok = [d for d in docs if d.status in {"extracted", "projected"}]
+    if not docs_ok:
+        raise RuntimeError("All documents failed extraction")
+    with stage(prof, "chunk", items=len(docs_ok)):
+        _ensure_sections(docs_ok, run.chunking_version)
+
+    with stage(prof, "clear_results"), transaction.atomic():
+        DocEmbedding.objects.filter(run=run).delete()
+        DocProjection.objects.filter(run=run).delete()
+        NeighborGraph.objects.filter(run=run).delete()
+        ClusterTree.objects.filter(run=run).delete()
+        ProjectionTile.objects.filter(run=run).delete()
+        ProjectionTileIndex.objects.filter(run=run).delete()
+
+    stats.update(documents=len(docs), extracted=len(to_extract), usable=len(docs_ok))
+    return [d.id for d in docs_ok]
+
+
+def herd_stage(run_id: int, doc_ids: list[int], stats: dict, prof: dict) -> list[int]:
+    # Herd phrases from scrubbed text (cohort-level), merged from cached per-document counts
+    docs = list(Document.objects.filter(id__in=doc_ids).only("id", "herd_bigrams"))
+    with stage(prof, "count_bigrams", items=len(docs)) as rec:
+        before = sum(d.herd_bigrams.get("version") == HERD_VERSION for d in docs)
+        _ensure_herd_bigrams(docs)
+        rec["cached"] = before
+    with stage(prof, "merge", items=len(docs)):
+        phrases = herd_phrases_from_counts([d.herd_bigrams["counts"] for d in docs], top_n=30)
+    AnalysisRun.objects.filter(id=run_id).update(herd_phrases={"bigrams": phrases})
+    stats.update(documents=len(docs))
+    return doc_ids
+
+
+def embed_section(run_id: int, section: str, doc_ids: list[int], stats: dict, prof: dict) -> dict | None:
+    """Embed one section and build its neighbour graph; None when too few documents have it."""
+    run = AnalysisRun.objects.get(id=run_id)
+    section_texts: list[str] = []
+    section_ids: list[int] = []
+    for d in Document.objects.filter(id__in=doc_ids).only("id", "sections").order_by("id"):
+        t = (d.sections.get(section) or "").strip()
+        if t:
+            section_texts.append(t[:12000])
+            section_ids.append(d.id)
+
+    with transaction.atomic():
+        DocEmbedding.objects.filter(run=run, section=section).delete()
+        NeighborGraph.objects.filter(run=run, section=section).delete()
+
+    # Need enough docs to make UMAP meaningful
+    if len(section_ids) < 5:
+        stats.update(skipped=True, documents=len(section_ids))
+        return None
+
+    hashes = [text_sha256(t) for t in section_texts]
+    parent = incremental_parent(run)  # None unless mode == "incremental"
+    reused = reusable_vectors(parent, section, section_ids, hashes) if parent else {}
+    fresh_idx = [i for i, d in enumerate(section_ids) if d not in reused]
+    fresh_pos = {i: j for j, i in enumerate(fresh_idx)}
+    V_fresh, hits, misses = None, 0, 0
+    if fresh_idx:
+        with stage(prof, "embed", items=len(fresh_idx)) as rec:
+            V_fresh, hits, misses = cached_embed_texts(
+                run.embedding_model,
+                run.chunking_version,
+                section,
+                [section_texts[i] for i in fresh_idx],
+                batch_size=settings.EMBED_BATCH_SIZE,
+                on_progress=lambda done, total: progress.stage_event(
+                    run_id, f"embed:{section}", "running", done=done, total=total
+                ),
+            )
+            rec.update(cache_hits=hits, cache_misses=misses)
+    V = np.vstack(
+        [V_fresh[fresh_pos[i]] if i in fresh_pos else reused[d] for i, d in enumerate(section_ids)]
+    ).astype(np.float32)
+
+    # store embeddings + precomputed neighbours (serves doc_detail without a DB scan)
+    with transaction.atomic():
+        # the dimension is whatever the model produces; every section of a run agrees on it
+        AnalysisRun.objects.filter(id=run.id).update(embedding_dim=V.shape[1])
+        with stage(prof, "db_write", items=len(section_ids)):
+            write_embeddings(run.id, section, section_ids, V, hashes, storage=run.vector_storage)
+        with stage(prof, "neighbor_graph", items=len(section_ids)):
+            build_neighbor_graph(
+                run.id, section, section_ids, V, settings.NEIGHBOR_GRAPH_K, settings.NEIGHBOR_GRAPH_BLOCK
+            )
+
+    stats.update(documents=len(section_ids), reused=len(reused), cache_hits=hits, cache_misses=misses)
+    return {"doc_ids": section_ids, "fresh_idx": fresh_idx}
+
+
+def project_section(run_id: int, section: str, embedded: dict | None, stats: dict, prof: dict) -> None:
+    """Project and cluster one section from its stored embeddings."""
+    run = AnalysisRun.objects.get(id=run_id)
+    with transaction.atomic():
+        DocProjection.objects.filter(run=run, section=section).delete()
+        ClusterTree.objects.filter(run=run, section=section).delete()
+        ProjectionTile.objects.filter(run=run, section=section).delete()
+        ProjectionTileIndex.objects.filter(run=run, section=section).delete()
+    if embedded is None:
+        stats.update(skipped=True)
+        return
+
+    doc_ids, fresh_idx = embedded["doc_ids"], embedded["fresh_idx"]
+    with stage(prof, "load_vectors", items=len(doc_ids)):
+        stored = load_vectors(DocEmbedding.objects.filter(run=run, section=section), run.vector_storage)
+        V = np.vstack([stored[d] for d in doc_ids])
+    params = run.umap_params or {}
+
+    # project + cluster (incremental runs keep the parent's map and place new points on it)
+    parent = incremental_parent(run)
+    placed = None
+    if parent and params.get("placement", "transform") == "transform":
+        with stage(prof, "placement", items=len(fresh_idx)):
+            placed = place_in_parent_layout(
+                parent, section, doc_ids, V, fresh_idx, int(params.get("n_neighbors", 15))
+            )
+    tree = None
+    if placed is None:
+        with stage(prof, "umap", items=len(doc_ids)) as rec:
+            coords = project_umap(V, params)
+        projection = {"engine": params.get("engine", "umap"), "n": len(doc_ids), **rec}
+        with stage(prof, "hdbscan", items=len(doc_ids)):
+            labels, outlier, tree = fit_clusters(coords, run.cluster_params)
+    else:
+        coords, labels, outlier = placed
+        projection = {"engine": "placement", "n": len(doc_ids), "placed": len(fresh_idx)}
+    _merge_json(run_id, "projection_stats", section, projection)
+
+    with stage(prof, "db_write", items=len(doc_ids)), transaction.atomic():
+        write_projections(run.id, section, doc_ids, coords, labels, outlier)
+        store_tiles(run.id, section, doc_ids, coords, labels, settings.TILE_GRID, settings.TILE_MAX_ZOOM)
+        if tree is not None:
+            store_cluster_tree(run.id, section, doc_ids, tree, cluster_params_for(len(doc_ids), run.cluster_params))
+    stats.update(documents=len(doc_ids))
+
+
+def finalize_run(run_id: int, doc_ids: list[int], stats: dict, prof: dict) -> None:
+    run = AnalysisRun.objects.get(id=run_id)
+    embeds = [s for key, s in run.stages.items() if key.startswith("embed:")]
+    run.embed_cache_hits = sum(s.get("cache_hits", 0) for s in embeds)
+    run.embed_cache_misses = sum(s.get("cache_misses", 0) for s in embeds)
+
+    # mark docs projected (optional but nice)
+    with transaction.atomic():
+        Document.objects.filter(id__in=doc_ids).update(status="projected")
+
+    # only a still-running run: a cohort deletion may have failed it meanwhile
+    finished = AnalysisRun.objects.filter(id=run_id, status="running").update(
+        embed_cache_hits=run.embed_cache_hits, embed_cache_misses=run.embed_cache_misses, status="done"
+    )
+    if not finished:
+        raise RuntimeError("Run was cancelled before it finished")
+
+    with stage(prof, "evict_embed_cache") as rec:
+        rec["items"] = evict_embedding_cache(settings.EMBED_CACHE_MAX_ENTRIES)
+    stats.update(evicted=rec["items"])
+
+
+def fail_run(run_id: int) -> None:
+    run = AnalysisRun.objects.filter(id=run_id).first()
+    if run is None:
+        return
+    errors = [f"{key}: {s['error']}" for key, s in run.stages.items() if s.get("status") == "failed"]
+    run.status = "failed"
+    run.error = "; ".join(errors) or "pipeline failed"
+    run.save(update_fields=["status", "error"])
+    progress.publish(run_id, type="run", status="failed", error=run.error)
@@ -0,0 +1,79 @@
+# backend/core/profiling.py
+"""Wall time, CPU time and memory for a block of pipeline work.
+
+Peak RSS is sampled from a background thread because ru_maxrss is a
+process-lifetime high-water mark and cannot be attributed to one section
+in a long-lived worker.
+"""
+from __future__ import annotations
+
+import resource
+import sys
+import threading
+import time
+from contextlib import contextmanager
+
+_PAGE = resource.getpagesize()
+
+
+def current_rss_bytes() -> int:
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * _PAGE
+    except OSError:  # no procfs (macOS): fall back to the lifetime peak
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak if sys.platform == "darwin" else peak * 1024
+
+
+class _PeakSampler(threading.Thread):
+    def __init__(self, interval: float):
+        super().__init__(daemon=True)
+        self.interval = interval
+        self.peak = current_rss_bytes()
+        self._done = threading.Event()
+
+    def run(self):
+        while not self._done.wait(self.interval):
+            self.peak = max(self.peak, current_rss_bytes())
+
+    def stop(self) -> int:
+        self._done.set()
+        self.join()
+        self.peak = max(self.peak, current_rss_bytes())
+        return self.peak
+
+
+@contextmanager
+def measure(out: dict, interval: float = 0.05):
+    """Fill `out` with seconds, start/peak RSS (MB) and the peak's growth over the start."""
+    start_rss = current_rss_bytes()
+    sampler = _PeakSampler(interval)
+    sampler.start()
+    t0 = time.perf_counter()
+    try:
+        yield out
+    finally:
+        seconds = time.perf_counter() - t0
+        peak = sampler.stop()
+        out.update(
+            seconds=round(seconds, 3),
+            rss_start_mb=round(start_rss / 2**20, 1),
+            rss_peak_mb=round(peak / 2**20, 1),
+            rss_delta_mb=round((peak - start_rss) / 2**20, 1),
+        )
+
+
+@contextmanager
+def stage(profile: dict, name: str, **counts):
+    """Record one step into profile[name]: measure() fields plus cpu_s and any item counts.
+
+    The yielded dict can take counts that are only known once the step has run.
+    """
+    record = dict(counts)
+    cpu0 = time.process_time()
+    try:
+        with measure(record):
+            yield record
+    finally:
+        record["cpu_s"] = round(time.process_time() - cpu0, 3)
+        profile[name] = record
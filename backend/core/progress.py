@@ -0,0 +1,98 @@
+# backend/core/progress.py
+"""Run progress events over Redis pub/sub (the Celery broker's Redis).
+
+Workers publish small JSON events to `run:<id>:progress`:
+
+    {"run_id", "ts", "type": "run", "status": "running" | "done" | "failed", ...}
+    {"run_id", "ts", "type": "stage", "stage": "embed", "section": "doc", "status", "done", "total", ...}
+
+The latest event is also kept under `run:<id>:progress:last` so a client
+that connects mid-run starts from the current state. Publishing is best
+effort: a Redis hiccup is logged and never fails a pipeline stage.
+views.run_events streams these to the browser as Server-Sent Events
+without touching Postgres.
+"""
+from __future__ import annotations
+
+import json
+import logging
+import time
+from typing import Iterator
+
+import redis
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+FINAL_STATUSES = {"done", "failed"}
+
+_client: redis.Redis | None = None
+
+
+def _redis() -> redis.Redis:
+    global _client
+    if _client is None:
+        _client = redis.Redis.from_url(settings.REDIS_URL)
+    return _client
+
+
+def channel(run_id: int) -> str:
+    return f"run:{run_id}:progress"
+
+
+def _last_key(run_id: int) -> str:
+    return f"run:{run_id}:progress:last"
+
+
+def publish(run_id: int, **event) -> None:
+    payload = json.dumps({"run_id": run_id, "ts": time.time(), **event}, default=str)
+    try:
+        with _redis().pipeline(transaction=False) as p:
+            p.set(_last_key(run_id), payload, ex=settings.RUN_PROGRESS_TTL_S)
+            p.publish(channel(run_id), payload)
+            p.execute()
+    except redis.RedisError as e:
+        logger.warning("progress event for run %s not published: %s", run_id, e)
+
+
+def stage_event(run_id: int, name: str, status: str, **detail) -> None:
+    """Publish a stage transition; `name` is a stages key such as "extract" or "embed:doc"."""
+    stage, _, section = name.partition(":")
+    if status == "done" and "documents" in detail:
+        detail = {"done": detail["documents"], "total": detail["documents"], **detail}
+    publish(run_id, type="stage", stage=stage, section=section or None, status=status, **detail)
+
+
+def is_final(event: dict) -> bool:
+    return event.get("type") == "run" and event.get("status") in FINAL_STATUSES
+
+
+def stream(
+    run_id: int, max_seconds: float, heartbeat_s: float, fallback: dict | None = None
+) -> Iterator[dict | None]:
+    """Yield the last known event, then live ones until the run ends or `max_seconds` pass.
+
+    `fallback` stands in for the last event when Redis has none (e.g. it expired).
+    None is yielded every `heartbeat_s` without traffic so the caller can keep the connection alive.
+    """
+    pubsub = _redis().pubsub(ignore_subscribe_messages=True)
+    pubsub.subscribe(channel(run_id))  # before reading the last event, so nothing falls in between
+    try:
+        last = _redis().get(_last_key(run_id))
+        event = json.loads(last) if last is not None else fallback
+        if event is not None:
+            yield event
+            if is_final(event):
+                return
+        deadline = time.monotonic() + max_seconds
+        while time.monotonic() < deadline:
+            msg = pubsub.get_message(timeout=heartbeat_s)
+            if msg is None:
+                yield None
+                continue
+            event = json.loads(msg["data"])
+            yield event
+            if is_final(event):
+                return
+    finally:
+        pubsub.close()
@@ -0,0 +1,20 @@
+# backend/core/renderers.py
+import json
+
+from rest_framework.renderers import BaseRenderer
+
+
+class PackedProjectionRenderer(BaseRenderer):
+    """`?format=packed`: bytes built by core.packing.pack_projection."""
+
+    media_type = "application/vnd.cohortmap.projection"
+    format = "packed"
+    charset = None
+    render_style = "binary"
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b""
+        if isinstance(data, (bytes, bytearray)):
+            return bytes(data)
+        return json.dumps(data).encode("utf-8")  # error payloads
@@ -1,12 +1,31 @@
 # backend/core/scrub.py
 import re
 
-EMAIL_RE = re.compile(r"\b[\w\.-]+@[\w\.-]+\.\w+\b")
-PHONE_RE = re.compile(r"(\+?\d[\d\-\s\(\)]{7,}\d)")
-URL_RE = re.compile(r"\bhttps?://\S+\b")
+# Every repetition is bounded, so a failed match attempt costs O(1) and scrubbing is
+# linear in the input even for adversarial text (long digit tables, "a.a.a...", "http://http://...").
+EMAIL = r"[\w\.-]{1,64}@[\w\.-]{1,253}\.\w{1,63}\b"
+PHONE = r"\+?\d[\d\-\s\(\)]{7,25}\d"
+URL = r"https?://\S{1,2048}\b"
+
+EMAIL_RE = re.compile(rf"\b{EMAIL}")
+PHONE_RE = re.compile(f"({PHONE})")
+URL_RE = re.compile(rf"\b{URL}")
+
+# One shared word-boundary test guards the URL and email branches (URL first, so a
+# URL wins over the address or digits inside it); phones may start mid-token.
+PII_RE = re.compile(rf"\b(?:(?P<url>{URL})|(?P<email>{EMAIL}))|(?P<phone>{PHONE})")
+
+REPLACEMENTS = {"email": "[EMAIL]", "phone": "[PHONE]", "url": "[URL]"}
+
+
+def _replace(m: re.Match) -> str:
+    return REPLACEMENTS[m.lastgroup]
+
 
 def scrub_pii(text: str) -> str:
-    t = EMAIL_RE.sub("[EMAIL]", text)
-    t = PHONE_RE.sub("[PHONE]", t)
-    t = URL_RE.sub("[URL]", t)
-    return t
+    return PII_RE.sub(_replace, text)
+
+
+def scrub_many(texts: list[str]) -> list[str]:
+    sub = PII_RE.sub
+    return [sub(_replace, t) for t in texts]
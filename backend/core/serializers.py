@@ -1,6 +1,6 @@
 # backend/core/serializers.py
 from rest_framework import serializers
-from core.models import Document, AnalysisRun, DocProjection
+from core.models import Document, AnalysisRun, DocProjection, DeletionJob
 
 class DocumentSerializer(serializers.ModelSerializer):
     class Meta:
@@ -12,6 +12,7 @@ class DocumentSerializer(serializers.ModelSerializer):
             "original_filename",
             "stored_name",
             "content_type",
+            "content_sha256",
             "status",
             "created_at",
         ]
@@ -19,7 +20,26 @@ class DocumentSerializer(serializers.ModelSerializer):
 class AnalysisRunSerializer(serializers.ModelSerializer):
     class Meta:
         model = AnalysisRun
-        fields = ["id", "created_at", "cohort_key", "embedding_model", "chunking_version", "umap_params", "status", "error"]
+        fields = [
+            "id",
+            "created_at",
+            "cohort_key",
+            "embedding_model",
+            "chunking_version",
+            "umap_params",
+            "mode",
+            "parent_run",
+            "status",
+            "error",
+            "embed_cache_hits",
+            "embed_cache_misses",
+            "cluster_params",
+            "stages",
+            "profile",
+            "projection_stats",
+            "vector_storage",
+            "embedding_dim",
+        ]
 
 class ProjectionPointSerializer(serializers.ModelSerializer):
     document_id = serializers.IntegerField(source="document.id")
@@ -29,3 +49,20 @@ class ProjectionPointSerializer(serializers.ModelSerializer):
     class Meta:
         model = DocProjection
         fields = ["document_id", "filename", "status", "x", "y", "cluster_id", "outlier_score"]
+
+class DeletionJobSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = DeletionJob
+        fields = [
+            "id",
+            "cohort_key",
+            "status",
+            "created_at",
+            "finished_at",
+            "files_total",
+            "files_deleted",
+            "file_errors",
+            "documents_deleted",
+            "runs_deleted",
+            "error",
+        ]
@@ -0,0 +1,57 @@
+# backend/core/synthetic.py
+"""Synthetic resumes for benchmarks: plausible text with HEADERS-style section headers, no PII."""
+from __future__ import annotations
+
+import random
+
+SKILLS = (
+    "python sql r excel tableau power-bi pandas numpy scikit-learn pytorch tensorflow spark "
+    "docker kubernetes aws gcp azure git linux javascript typescript react django flask "
+    "statistics regression forecasting experimentation etl airflow dbt looker"
+).split()
+
+VERBS = "led built designed analyzed improved automated launched reduced mentored migrated".split()
+OBJECTS = (
+    "data pipeline|reporting dashboard|customer survey|research study|inventory model|"
+    "pricing experiment|onboarding flow|grant proposal|lab protocol|community program"
+).split("|")
+OUTCOMES = (
+    "cutting turnaround time by 30%|serving 200 weekly users|saving 12 hours per week|"
+    "raising retention by 8%|supporting a $40k budget|with a team of four"
+).split("|")
+ROLES = "Data Analyst|Research Assistant|Teaching Assistant|Software Intern|Lab Technician|Program Coordinator".split("|")
+ORGS = "Acme Corp|State University|City Health Dept|Northwind Labs|Blue River Nonprofit|Contoso".split("|")
+
+SECTION_HEADERS = {
+    "skills": ["Skills", "Technical Skills", "Core Competencies", "Tools"],
+    "experience": ["Experience", "Work Experience", "Professional Experience", "Employment"],
+    "projects": ["Projects", "Selected Projects"],
+    "education": ["Education", "Academic Background"],
+}
+
+
+def synthetic_resume(rng: random.Random) -> str:
+    lines = ["Candidate Summary", "Motivated early-career professional interested in applied analytics."]
+
+    lines.append(rng.choice(SECTION_HEADERS["education"]))
+    lines.append(f"B.S. in {rng.choice(['Statistics', 'Biology', 'Economics', 'Computer Science'])}, {rng.choice(ORGS)}")
+
+    lines.append(rng.choice(SECTION_HEADERS["experience"]))
+    for _ in range(rng.randint(1, 4)):
+        lines.append(f"{rng.choice(ROLES)}, {rng.choice(ORGS)}")
+        for _ in range(rng.randint(2, 5)):
+            lines.append(f"- {rng.choice(VERBS).capitalize()} a {rng.choice(OBJECTS)} {rng.choice(OUTCOMES)}")
+
+    if rng.random() < 0.7:
+        lines.append(rng.choice(SECTION_HEADERS["projects"]))
+        for _ in range(rng.randint(1, 3)):
+            lines.append(f"- {rng.choice(VERBS).capitalize()} a {rng.choice(OBJECTS)} using {rng.choice(SKILLS)}")
+
+    lines.append(rng.choice(SECTION_HEADERS["skills"]))
+    lines.append(", ".join(rng.sample(SKILLS, rng.randint(5, 15))))
+    return "\n".join(lines)
+
+
+def synthetic_corpus(n: int, seed: int = 0) -> list[str]:
+    rng = random.Random(seed)
+    return [synthetic_resume(rng) for _ in range(n)]
@@ -1,116 +1,143 @@
 # backend/core/tasks.py
 from __future__ import annotations
 
-import numpy as np
-from celery import shared_task
-from django.db import transaction
+import redis
+from celery import chain, chord, group, shared_task
+from celery.exceptions import Ignore
+from django.conf import settings
+from django.db import InterfaceError, OperationalError
+
+from core.models import Document
+from core.extract_pool import extract_and_scrub
+from core import pipeline, progress
+from core.deletion import run_deletion_job
+from core.pipeline import EXTRACTED_FIELDS, SECTIONS_FOR_VIEWS
+from core.profiling import stage as profile_stage
+from core.worker import observe_profile
+
+
+@shared_task(soft_time_limit=settings.EXTRACT_TIMEOUT_S)
+def extract_document(doc_id: int):
+    if not pipeline.claim_for_extraction([doc_id]):
+        return  # already extracted, or claimed by a run
+    try:
+        d = Document.objects.get(id=doc_id)
+        try:
+            res = extract_and_scrub(d.file_path)
+        except Exception as e:
+            res = e
+        pipeline.apply_extraction(d, res)
+        d.save(update_fields=EXTRACTED_FIELDS)
+    except BaseException as e:
+        pipeline.release_claims([doc_id], repr(e))  # don't leave it "extracting" until the claim goes stale
+        raise
+
+# Worth another attempt: the database or Redis dropping out, network timeouts. Anything else
+# ("No documents found", every extraction failed, a bad parameter) fails the same way again.
+TRANSIENT_ERRORS = (
+    OperationalError,
+    InterfaceError,
+    redis.ConnectionError,
+    redis.TimeoutError,
+    ConnectionError,
+    TimeoutError,
+)
+
+
+def _run_stage(task, run_id: int, stage: str, fn, *args, waits: int = 0):
+    """Run one pipeline stage: progress into AnalysisRun.stages, costs into .profile, retries on transient errors.
+
+    `waits` is how many of the task's retries were reschedules rather than failures (extract_stage).
+    """
+    if pipeline.run_cancelled(run_id):  # a sibling section failed it, or its cohort is being deleted
+        raise Ignore()
+    failures = task.request.retries - waits
+    attempt = failures + 1
+    pipeline.mark_stage(run_id, stage, "running", attempt=attempt)
+    stats: dict = {}
+    prof: dict = {}
+    try:
+        with profile_stage(prof, "total"):
+            result = fn(*args, stats, prof)
+    except Exception as e:
+        if pipeline.run_cancelled(run_id):  # failed by a sibling or a cohort deletion meanwhile: no retry
+            pipeline.mark_stage(run_id, stage, "failed", attempt=attempt, error=str(e))
+            raise Ignore()
+        if isinstance(e, TRANSIENT_ERRORS) and failures < task.max_retries:
+            pipeline.mark_stage(run_id, stage, "retrying", attempt=attempt, error=str(e))
+            raise task.retry(exc=e, countdown=settings.STAGE_RETRY_DELAY_S, max_retries=task.max_retries + waits)
+        pipeline.mark_stage(run_id, stage, "failed", attempt=attempt, error=str(e))
+        pipeline.fail_run(run_id)  # don't leave the run "running" while sibling sections finish
+        raise
+    finally:
+        pipeline.record_profile(run_id, stage, prof)
+        observe_profile(stage, prof)
+    pipeline.mark_stage(run_id, stage, "skipped" if stats.get("skipped") else "done", attempt=attempt, **stats)
+    return result
+
+
+@shared_task(bind=True, max_retries=settings.STAGE_MAX_RETRIES)
+def extract_stage(self, run_id: int, waits: int = 0):
+    # Upload-time extraction (extract_document) may still be working on the cohort. Check back
+    # later instead of sleeping here: a sleeping stage holds the worker slot those tasks need.
+    if waits * settings.EXTRACT_WAIT_POLL_S < settings.EXTRACT_WAIT_TIMEOUT_S and pipeline.extraction_pending(run_id):
+        progress.stage_event(run_id, "extract", "waiting", waited_s=waits * settings.EXTRACT_WAIT_POLL_S)
+        raise self.retry(
+            args=(run_id, waits + 1),
+            countdown=settings.EXTRACT_WAIT_POLL_S,
+            max_retries=self.request.retries + 1,
+        )
+    return _run_stage(self, run_id, "extract", pipeline.extract_stage, run_id, waits=waits)
+
+
+@shared_task(bind=True, max_retries=settings.STAGE_MAX_RETRIES)
+def herd_stage(self, doc_ids: list[int], run_id: int):
+    return _run_stage(self, run_id, "herd", pipeline.herd_stage, run_id, doc_ids)
+
+
+@shared_task(bind=True, max_retries=settings.STAGE_MAX_RETRIES)
+def embed_section(self, doc_ids: list[int], run_id: int, section: str):
+    return _run_stage(self, run_id, f"embed:{section}", pipeline.embed_section, run_id, section, doc_ids)
+
+
+@shared_task(bind=True, max_retries=settings.STAGE_MAX_RETRIES)
+def project_section(self, embedded: dict | None, run_id: int, section: str):
+    return _run_stage(self, run_id, f"project:{section}", pipeline.project_section, run_id, section, embedded)
+
+
+@shared_task(bind=True, max_retries=settings.STAGE_MAX_RETRIES)
+def finalize_run(self, results: list, run_id: int):
+    doc_ids = results[0]  # herd_stage passes the extracted ids through
+    result = _run_stage(self, run_id, "finalize", pipeline.finalize_run, run_id, doc_ids)
+    progress.publish(run_id, type="run", status="done")  # after finalize's own stage event: streams end here
+    return result
 
-from core.models import AnalysisRun, Document, DocEmbedding, DocProjection
-from core.text_extract import extract_text
-from core.scrub import scrub_pii
-from core.embed import embed_text, l2_norm
-from core.umap_project import project_umap, cluster_and_outliers
-from core.chunking import chunk_sections
-from core.herd import herd_phrases
 
-SECTIONS_FOR_VIEWS = ["doc", "skills", "experience"]  # keep small for now
+@shared_task
+def fail_run(run_id: int):
+    # Backstop for errors outside a stage (e.g. the chord itself failing).
+    pipeline.fail_run(run_id)
+
+
+def analysis_pipeline(run_id: int):
+    """extract -> (herd | embed -> project per section, in parallel) -> finalize."""
+    sections = [
+        chain(embed_section.s(run_id, section), project_section.s(run_id, section))
+        for section in SECTIONS_FOR_VIEWS
+    ]
+    return chain(
+        extract_stage.si(run_id),
+        chord(group(herd_stage.s(run_id), *sections), finalize_run.s(run_id)),
+    ).on_error(fail_run.si(run_id))
 
 
 @shared_task
 def run_analysis(run_id: int):
-    run = AnalysisRun.objects.get(id=run_id)
-    run.status = "running"
-    run.error = ""
-    run.save(update_fields=["status", "error"])
+    if not pipeline.start_run(run_id):
+        return
+    analysis_pipeline(run_id).apply_async()
 
-    try:
-        docs = list(Document.objects.filter(cohort_key=run.cohort_key).order_by("id"))
-        if not docs:
-            raise RuntimeError("No documents found for cohort_key")
-
-        # 1) Extract + scrub (best-effort per doc)
-        for d in docs:
-            if d.status in {"uploaded", "failed"}:
-                try:
-                    text = extract_text(d.file_path)
-                    d.raw_text = text
-                    d.scrubbed_text = scrub_pii(text)
-                    d.status = "extracted"
-                    d.error = ""
-                except Exception as e:
-                    d.status = "failed"
-                    d.error = str(e)
-                d.save()
-
-        docs_ok = [d for d in docs if d.status != "failed"]
-        if not docs_ok:
-            raise RuntimeError("All documents failed extraction")
-
-        # 1b) Herd phrases from scrubbed text (cohort-level)
-        texts_for_herd = [d.scrubbed_text for d in docs_ok if d.scrubbed_text]
-        run.herd_phrases = {"bigrams": herd_phrases(texts_for_herd, top_n=30)}
-        run.save(update_fields=["herd_phrases"])
-
-        # 2) Clear prior results for this run
-        with transaction.atomic():
-            DocEmbedding.objects.filter(run=run).delete()
-            DocProjection.objects.filter(run=run).delete()
-
-        # 3) Per-section embeddings + projection
-        for section in SECTIONS_FOR_VIEWS:
-            section_texts: list[str] = []
-            section_docs: list[Document] = []
-
-            for d in docs_ok:
-                chunks = chunk_sections((d.scrubbed_text or "")[:20000])  # guard
-                t = (chunks.get(section) or "").strip()
-                if t:
-                    section_texts.append(t)
-                    section_docs.append(d)
-
-            # Need enough docs to make UMAP meaningful
-            if len(section_docs) < 5:
-                continue
-
-            vectors = [embed_text(run.embedding_model, t[:12000]) for t in section_texts]
-            V = np.vstack(vectors).astype(np.float32)
-
-            # store embeddings
-            with transaction.atomic():
-                for d, vec in zip(section_docs, V):
-                    DocEmbedding.objects.create(
-                        document=d,
-                        run=run,
-                        section=section,
-                        vector=vec.tolist(),
-                        norm=l2_norm(vec),
-                    )
-
-            # project + cluster
-            coords = project_umap(V, run.umap_params or {})
-            labels, outlier = cluster_and_outliers(coords)
-
-            with transaction.atomic():
-                for d, (x, y), lab, sc in zip(section_docs, coords, labels, outlier):
-                    DocProjection.objects.create(
-                        document=d,
-                        run=run,
-                        section=section,
-                        x=float(x),
-                        y=float(y),
-                        cluster_id=int(lab),
-                        outlier_score=float(sc),
-                    )
-
-        # mark docs projected (optional but nice)
-        with transaction.atomic():
-            Document.objects.filter(id__in=[d.id for d in docs_ok]).update(status="projected")
-
-        run.status = "done"
-        run.save(update_fields=["status"])
 
-    except Exception as e:
-        run.status = "failed"
-        run.error = str(e)
-        run.save(update_fields=["status", "error"])
-        raise
\ No newline at end of file
+@shared_task
+def delete_cohort(job_id: int):
+    run_deletion_job(job_id)
@@ -1,13 +1,13 @@
 # backend/core/text_extract.py
 from __future__ import annotations
 from pathlib import Path
-import pdfplumber
-from docx import Document as DocxDocument
 
 def extract_text(path: str) -> str:
     p = Path(path)
     suffix = p.suffix.lower()
     if suffix == ".pdf":
+        import pdfplumber
+
         chunks = []
         with pdfplumber.open(path) as pdf:
             for page in pdf.pages:
@@ -16,6 +16,8 @@ def extract_text(path: str) -> str:
                     chunks.append(t)
         return "\n".join(chunks).strip()
     if suffix in {".docx"}:
+        from docx import Document as DocxDocument
+
         doc = DocxDocument(path)
         return "\n".join([para.text for para in doc.paragraphs]).strip()
     if suffix in {".txt"}:
@@ -0,0 +1,108 @@
+# backend/core/tiles.py
+"""Quadtree tiles over a run's 2D projection.
+
+Coordinates are normalised into the unit square anchored at (min_x, min_y)
+with side `extent`. Zoom z splits it into 2^z x 2^z tiles. A tile with more
+than grid*grid points is thinned: it is divided into a grid x grid raster
+and keeps one point per occupied cell, weighted by how many points that cell
+holds. Sparse regions survive intact and dense ones are summarised. The
+deepest zoom, where no tile needs thinning or TILE_MAX_ZOOM is hit, keeps
+every point.
+"""
+from __future__ import annotations
+
+import numpy as np
+
+from core.models import ProjectionTile, ProjectionTileIndex
+
+TILE_MAX_OVERZOOM = 8  # zooms served past an index's max_zoom (clipped from its deepest tiles)
+
+
+def _unit(coords: np.ndarray) -> tuple[np.ndarray, float, float, float]:
+    lo = coords.min(axis=0)
+    extent = float((coords.max(axis=0) - lo).max()) or 1.0
+    u = np.clip((coords - lo) / extent, 0.0, np.nextafter(1.0, 0.0))
+    return u, float(lo[0]), float(lo[1]), extent
+
+
+def build_tiles(
+    doc_ids: list[int],
+    coords: np.ndarray,
+    labels: np.ndarray,
+    grid: int,
+    max_zoom: int,
+) -> tuple[dict, list[tuple[int, int, int, int, list]]]:
+    """Returns (index meta, [(zoom, x, y, count, points)]); points are [doc_id, x, y, cluster_id, weight]."""
+    ids = np.asarray(doc_ids, dtype=np.int64)
+    coords = np.asarray(coords, dtype=np.float64)
+    labels = np.asarray(labels, dtype=np.int64)
+    u, min_x, min_y, extent = _unit(coords)
+    cap = grid * grid
+
+    # deepest level needed: first zoom where every tile fits without thinning
+    top = max_zoom
+    for z in range(max_zoom + 1):
+        t = (u * (1 << z)).astype(np.int64)
+        if np.unique(t[:, 0] * (1 << z) + t[:, 1], return_counts=True)[1].max() <= cap:
+            top = z
+            break
+
+    def point(i: int, weight: int) -> list:
+        return [int(ids[i]), float(coords[i, 0]), float(coords[i, 1]), int(labels[i]), int(weight)]
+
+    tiles = []
+    for z in range(top + 1):
+        side = 1 << z
+        t = (u * side).astype(np.int64)
+        c = (u * side * grid).astype(np.int64)
+        tile_key = t[:, 0] * side + t[:, 1]
+        cell_key = c[:, 0] * (side * grid) + c[:, 1]
+
+        order = np.lexsort((cell_key, tile_key))
+        keys, starts, counts = np.unique(tile_key[order], return_index=True, return_counts=True)
+        for key, start, count in zip(keys, starts, counts):
+            members = order[start:start + count]
+            if z == top or count <= cap:
+                pts = [point(i, 1) for i in members]
+            else:
+                _, first, per_cell = np.unique(cell_key[members], return_index=True, return_counts=True)
+                pts = [point(members[f], w) for f, w in zip(first, per_cell)]
+            tiles.append((z, int(key // side), int(key % side), int(count), pts))
+
+    meta = {"min_x": min_x, "min_y": min_y, "extent": extent, "max_zoom": top, "tile_capacity": cap}
+    return meta, tiles
+
+
+def store_tiles(run_id: int, section: str, doc_ids, coords, labels, grid: int, max_zoom: int) -> None:
+    meta, tiles = build_tiles(doc_ids, coords, labels, grid, max_zoom)
+    ProjectionTileIndex.objects.create(run_id=run_id, section=section, **meta)
+    ProjectionTile.objects.bulk_create(
+        (
+            ProjectionTile(run_id=run_id, section=section, zoom=z, x=x, y=y, count=n, points=pts)
+            for z, x, y, n, pts in tiles
+        ),
+        batch_size=500,
+    )
+
+
+def _tile_coord(v: float, lo: float, extent: float, zoom: int) -> int:
+    return min(max(int((v - lo) / extent * (1 << zoom)), 0), (1 << zoom) - 1)
+
+
+def tile_points(index: ProjectionTileIndex, zoom: int, x: int, y: int) -> dict:
+    """Points for tile (zoom, x, y). Beyond max_zoom, the max_zoom ancestor is clipped to the tile."""
+    src_zoom = min(zoom, index.max_zoom)
+    shift = zoom - src_zoom
+    tile = ProjectionTile.objects.filter(
+        run_id=index.run_id, section=index.section, zoom=src_zoom, x=x >> shift, y=y >> shift
+    ).first()
+    points = tile.points if tile else []
+    count = tile.count if tile else 0
+    if shift:
+        points = [
+            p for p in points
+            if _tile_coord(p[1], index.min_x, index.extent, zoom) == x
+            and _tile_coord(p[2], index.min_y, index.extent, zoom) == y
+        ]
+        count = len(points)
+    return {"zoom": zoom, "x": x, "y": y, "count": count, "points": points}
@@ -1,25 +1,187 @@
 # backend/core/umap_project.py
 from __future__ import annotations
 import numpy as np
-import umap
-import hdbscan
+from django.conf import settings
 
-def project_umap(vectors: np.ndarray, params: dict) -> np.ndarray:
-    reducer = umap.UMAP(
+# umap and hdbscan (numba, scipy, sklearn) are imported where they are used:
+# views import this module for its parameter checks and must stay light.
+
+# umap_params["engine"]:
+#   umap      - fit on the raw vectors (default)
+#   pca+umap  - PCA down to pca_components first; cosine becomes euclidean on unit rows
+#   landmark  - fit on landmark_size sampled rows, transform the rest in transform_batch chunks
+PROJECTION_ENGINES = ("umap", "pca+umap", "landmark")
+
+
+def _reducer(params: dict, metric: str | None = None):
+    import umap
+
+    return umap.UMAP(
         n_neighbors=int(params.get("n_neighbors", 15)),
         min_dist=float(params.get("min_dist", 0.1)),
-        metric=str(params.get("metric", "cosine")),
+        metric=metric or str(params.get("metric", "cosine")),
         random_state=int(params.get("random_state", 42)),
     )
-    return reducer.fit_transform(vectors).astype(np.float32)
 
-def cluster_and_outliers(coords: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
-    min_cluster_size = max(3, min(10, coords.shape[0] // 5))
-    clusterer = hdbscan.HDBSCAN(min_cluster_size=min_cluster_size)
+
+def _pca_reduce(vectors: np.ndarray, params: dict) -> np.ndarray:
+    from sklearn.decomposition import PCA
+
+    X = vectors
+    if params.get("metric", "cosine") == "cosine":  # project_umap fits euclidean on these rows
+        X = vectors / (np.linalg.norm(vectors, axis=1, keepdims=True) + 1e-12)
+    n_components = min(int(params.get("pca_components", 50)), *vectors.shape)
+    if n_components >= vectors.shape[1]:
+        return X.astype(np.float32)
+    pca = PCA(n_components=n_components, svd_solver="randomized", random_state=int(params.get("random_state", 42)))
+    return pca.fit_transform(X).astype(np.float32)
+
+
+def _landmark(vectors: np.ndarray, params: dict) -> np.ndarray:
+    n = vectors.shape[0]
+    size = int(params.get("landmark_size", 10000))
+    if n <= size:
+        return _reducer(params).fit_transform(vectors)
+
+    rng = np.random.default_rng(int(params.get("random_state", 42)))
+    landmarks = np.sort(rng.choice(n, size=size, replace=False))
+    rest = np.setdiff1d(np.arange(n), landmarks, assume_unique=True)
+
+    reducer = _reducer(params)
+    coords = np.empty((n, 2), dtype=np.float32)
+    coords[landmarks] = reducer.fit_transform(vectors[landmarks])
+    batch = int(params.get("transform_batch", 10000))
+    for start in range(0, rest.size, batch):
+        idx = rest[start:start + batch]
+        coords[idx] = reducer.transform(vectors[idx])
+    return coords
+
+
+def project_umap(vectors: np.ndarray, params: dict) -> np.ndarray:
+    engine = params.get("engine", "umap")
+    if engine == "pca+umap":
+        metric = "euclidean" if params.get("metric", "cosine") == "cosine" else None
+        coords = _reducer(params, metric).fit_transform(_pca_reduce(vectors, params))
+    elif engine == "landmark":
+        coords = _landmark(vectors, params)
+    elif engine == "umap":
+        coords = _reducer(params).fit_transform(vectors)
+    else:
+        raise ValueError(f"Unknown projection engine: {engine!r}")
+    return np.asarray(coords, dtype=np.float32)
+
+
+def umap_params_error(params) -> str | None:
+    """Why `params` can't be stored as AnalysisRun.umap_params, or None if it can."""
+    if not isinstance(params, dict):
+        return "umap_params must be an object"
+    if params.get("engine", "umap") not in PROJECTION_ENGINES:
+        return f"engine must be one of {', '.join(PROJECTION_ENGINES)}"
+    return None
+
+
+CLUSTER_ALGORITHMS = ("auto", "best", "generic", "prims_kdtree", "prims_balltree", "boruvka_kdtree", "boruvka_balltree")
+
+# integer cluster_params -> (lowest, highest) accepted; leaving one out (or null) picks the default
+_CLUSTER_INT_PARAMS = {"min_cluster_size": (2, 100_000), "min_samples": (1, 100_000), "core_dist_n_jobs": (-1, 256)}
+
+
+def cluster_params_error(params) -> str | None:
+    """Why `params` can't be stored as AnalysisRun.cluster_params, or None if it can."""
+    if not isinstance(params, dict):
+        return "cluster_params must be an object"
+    allowed = {*_CLUSTER_INT_PARAMS, "algorithm", "cluster_selection_method"}
+    unknown = sorted(set(params) - allowed)
+    if unknown:
+        return f"unknown cluster_params: {', '.join(unknown)}"
+    for key, (lowest, highest) in _CLUSTER_INT_PARAMS.items():
+        value = params.get(key)
+        if value is None:
+            continue
+        if isinstance(value, bool) or not isinstance(value, int) or not lowest <= value <= highest or value == 0:
+            return f"{key} must be an integer from {lowest} to {highest}" + (" other than 0" if lowest < 0 else "")
+    if (params.get("algorithm") or "auto") not in CLUSTER_ALGORITHMS:
+        return f"algorithm must be one of {', '.join(CLUSTER_ALGORITHMS)}"
+    if (params.get("cluster_selection_method") or "eom") not in {"eom", "leaf"}:
+        return "cluster_selection_method must be 'eom' or 'leaf'"
+    return None
+
+
+def cluster_params_for(n: int, params: dict | None) -> dict:
+    """Resolved HDBSCAN settings for n points; min_samples is pinned so the tree can be re-cut later."""
+    params = params or {}
+    min_cluster_size = int(params.get("min_cluster_size") or max(3, min(10, n // 5)))
+    algorithm = params.get("algorithm") or "auto"
+    if algorithm == "auto":
+        algorithm = "boruvka_kdtree" if n >= settings.CLUSTER_BORUVKA_MIN_POINTS else "prims_kdtree"
+    return {
+        "min_cluster_size": min_cluster_size,
+        "min_samples": int(params.get("min_samples") or min_cluster_size),
+        "algorithm": algorithm,
+        "core_dist_n_jobs": int(params.get("core_dist_n_jobs") or settings.CLUSTER_CORE_DIST_N_JOBS),
+        "cluster_selection_method": params.get("cluster_selection_method") or "eom",
+    }
+
+
+def fit_clusters(coords: np.ndarray, params: dict | None = None) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """HDBSCAN labels, outlier scores and the single-linkage tree they were cut from."""
+    import hdbscan
+
+    clusterer = hdbscan.HDBSCAN(**cluster_params_for(coords.shape[0], params))
     labels = clusterer.fit_predict(coords)
 
     # Outlier score: use HDBSCAN outlier scores if present, else zeros
     scores = getattr(clusterer, "outlier_scores_", None)
     if scores is None:
         scores = np.zeros(coords.shape[0], dtype=np.float32)
-    return labels.astype(int), scores.astype(np.float32)
+    return labels.astype(int), scores.astype(np.float32), clusterer._single_linkage_tree
+
+
+def cluster_and_outliers(coords: np.ndarray, params: dict | None = None) -> tuple[np.ndarray, np.ndarray]:
+    labels, scores, _ = fit_clusters(coords, params)
+    return labels, scores
+
+
+def clusters_from_tree(
+    single_linkage_tree: np.ndarray, min_cluster_size: int, cluster_selection_method: str = "eom"
+) -> tuple[np.ndarray, np.ndarray]:
+    """Re-cut a stored single-linkage tree: what HDBSCAN does after its MST, without the refit."""
+    from hdbscan._hdbscan_tree import compute_stability, condense_tree, get_clusters, outlier_scores
+
+    condensed = condense_tree(single_linkage_tree, min_cluster_size)
+    labels, _, _ = get_clusters(condensed, compute_stability(condensed), cluster_selection_method)
+    return labels.astype(int), outlier_scores(condensed).astype(np.float32)
+
+def place_new_points(
+    ref_vectors: np.ndarray,
+    ref_coords: np.ndarray,
+    ref_labels: np.ndarray,
+    ref_outlier: np.ndarray,
+    new_vectors: np.ndarray,
+    n_neighbors: int = 15,
+) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Drop new vectors into an existing 2D layout without refitting.
+
+    Each new point lands at the similarity-weighted mean of its k nearest
+    reference points (cosine), the same initialisation UMAP's `transform`
+    starts from; it takes their weighted-majority cluster and mean outlier score.
+    """
+    k = max(1, min(n_neighbors, ref_vectors.shape[0]))
+    R = ref_vectors / (np.linalg.norm(ref_vectors, axis=1, keepdims=True) + 1e-12)
+    Q = new_vectors / (np.linalg.norm(new_vectors, axis=1, keepdims=True) + 1e-12)
+
+    sims = Q @ R.T
+    nn = np.argpartition(-sims, k - 1, axis=1)[:, :k]
+    w = np.clip(np.take_along_axis(sims, nn, axis=1), 1e-6, None)
+    w /= w.sum(axis=1, keepdims=True)
+
+    coords = np.einsum("nk,nkd->nd", w, ref_coords[nn]).astype(np.float32)
+    outlier = (w * ref_outlier[nn]).sum(axis=1).astype(np.float32)
+
+    labels = np.empty(new_vectors.shape[0], dtype=int)
+    for i in range(new_vectors.shape[0]):
+        votes: dict[int, float] = {}
+        for lab, wt in zip(ref_labels[nn[i]], w[i]):
+            votes[int(lab)] = votes.get(int(lab), 0.0) + float(wt)
+        labels[i] = max(votes, key=votes.get)
+    return coords, labels, outlier
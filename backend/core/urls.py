@@ -4,18 +4,25 @@ from . import views
 
 urlpatterns = [
     path("upload/", views.upload),
+    path("upload/archive/", views.upload_archive),
     path("documents/", views.documents),
 
     path("runs/start/", views.start_run),
     path("runs/", views.list_runs),
 
     path("runs/<int:run_id>/", views.run_status),
+    path("runs/<int:run_id>/events/", views.run_events),
     path("runs/<int:run_id>/projection/", views.projection),
+    path("runs/<int:run_id>/tiles/", views.tile_index),
+    path("runs/<int:run_id>/tiles/<int:zoom>/<int:x>/<int:y>/", views.tile),
     path("runs/<int:run_id>/doc/<int:doc_id>/", views.doc_detail),
+    path("runs/<int:run_id>/neighbors/", views.neighbors),
 
     path("runs/<int:run_id>/herd/", views.herd),
     path("runs/<int:run_id>/rerun/", views.rerun),
+    path("runs/<int:run_id>/recluster/", views.recluster),
 
     path("cohorts/<str:cohort_key>/", views.delete_cohort),
+    path("deletions/<int:job_id>/", views.deletion_status),
     path("health/", views.health),
 ]
\ No newline at end of file
@@ -0,0 +1,72 @@
+# backend/core/vectors.py
+"""How a run stores its DocEmbedding vectors (AnalysisRun.vector_storage).
+
+    float32  `vector`      pgvector vector    4 bytes/dim, exact
+    halfvec  `half_vector` pgvector halfvec   2 bytes/dim, HNSW-searchable
+    int8     `int8_vector` bytea + `int8_scale`  1 byte/dim + 4, exact scan only
+
+int8 is symmetric per-vector quantization: q = round(x / scale) with
+scale = max|x| / 127, so x ~= q * scale. Cosine distance does not depend on
+the scale, which lets neighbour search score the int8 codes directly.
+Vectors have no fixed dimension; each row records its own `dim`, and the
+HNSW indexes in models.py cover the common dimensions.
+"""
+from __future__ import annotations
+
+from typing import Iterator
+
+import numpy as np
+from pgvector import HalfVector
+
+VECTOR_STORAGE_MODES = ("float32", "halfvec", "int8")
+
+# DocEmbedding columns holding the vector in each mode, and their COPY types
+COLUMNS = {
+    "float32": ["vector"],
+    "halfvec": ["half_vector"],
+    "int8": ["int8_vector", "int8_scale"],
+}
+COPY_TYPES = {
+    "float32": ["vector"],
+    "halfvec": ["halfvec"],
+    "int8": ["bytea", "float8"],
+}
+
+
+def quantize_int8(V: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    """(codes int8 (n, d), scales float32 (n,)) with V ~= codes * scales[:, None]."""
+    V = np.asarray(V, dtype=np.float32)
+    scales = np.abs(V).max(axis=1) / 127.0
+    scales[scales == 0] = 1.0
+    Q = np.clip(np.rint(V / scales[:, None]), -127, 127).astype(np.int8)
+    return Q, scales.astype(np.float32)
+
+
+def encode(mode: str, V: np.ndarray) -> Iterator[tuple]:
+    """Per-row values for COLUMNS[mode]."""
+    if mode == "float32":
+        return ((v,) for v in np.ascontiguousarray(V, dtype=np.float32))
+    if mode == "halfvec":
+        return ((HalfVector(v),) for v in np.asarray(V, dtype=np.float32))
+    if mode == "int8":
+        Q, scales = quantize_int8(V)
+        return ((q.tobytes(), float(s)) for q, s in zip(Q, scales))
+    raise ValueError(f"unknown vector storage {mode!r}")
+
+
+def decode(mode: str, *values) -> np.ndarray:
+    """One stored vector (the COLUMNS[mode] values of a row) back as float32."""
+    if mode == "float32":
+        return np.asarray(values[0], dtype=np.float32)
+    if mode == "halfvec":
+        v = values[0]
+        return (v.to_numpy() if isinstance(v, HalfVector) else np.asarray(v)).astype(np.float32)
+    if mode == "int8":
+        codes, scale = values
+        return np.frombuffer(bytes(codes), dtype=np.int8).astype(np.float32) * np.float32(scale)
+    raise ValueError(f"unknown vector storage {mode!r}")
+
+
+def load_vectors(qs, mode: str) -> dict[int, np.ndarray]:
+    """document_id -> float32 vector for a DocEmbedding queryset stored in `mode`."""
+    return {row[0]: decode(mode, *row[1:]) for row in qs.values_list("document_id", *COLUMNS[mode])}
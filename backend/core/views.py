@@ -1,20 +1,41 @@
 # backend/core/views.py
 from __future__ import annotations
 
+import hashlib
+import json
+
+from celery import current_app
+from django.conf import settings
+from django.core.files import File
 from django.core.files.storage import default_storage
-from django.db import transaction
-from rest_framework.decorators import api_view
+from django.db import connection, transaction
+from django.http import JsonResponse, StreamingHttpResponse
+from django.utils.http import parse_etags
+from django.views.decorators.http import require_GET
+from rest_framework.decorators import api_view, renderer_classes
+from rest_framework.renderers import JSONRenderer
 from rest_framework.response import Response
 from rest_framework import status
 
-from core.models import Document, AnalysisRun, DocProjection, AuditEvent
+from core.models import Document, AnalysisRun, DocProjection, AuditEvent, DeletionJob, ProjectionTileIndex
 from core.serializers import (
     DocumentSerializer,
     AnalysisRunSerializer,
     ProjectionPointSerializer,
+    DeletionJobSerializer,
 )
-from core.tasks import run_analysis
-from core.neighbor import nearest_documents
+from core.neighbor import nearest_documents, nearest_documents_batch
+from core.knn import graph_neighbors
+from core.cluster_tree import recluster as recluster_from_tree
+from core import progress
+from core.packing import pack_projection
+from core.pagination import NEXT_CURSOR_HEADER, CursorError, keyset_page, page_size
+from core.renderers import PackedProjectionRenderer
+from core.tiles import TILE_MAX_OVERZOOM, tile_points
+from core.ingest import ArchiveError, hash_and_spool, ingest_archive
+from core.deletion import active_deletion_job, cohort_deleting
+from core.umap_project import cluster_params_error, umap_params_error
+from core.vectors import VECTOR_STORAGE_MODES
 
 
 @api_view(["GET"])
@@ -22,39 +43,122 @@ def health(request):
     return Response({"status": "ok"})
 
 
+def _enqueue(task_name: str, *args):
+    # By name, so the web process never imports core.tasks and the ML stack behind it.
+    return current_app.send_task(f"core.tasks.{task_name}", args=args)
+
+
+def _cohort_being_deleted() -> Response:
+    return Response({"error": "Cohort is being deleted"}, status=status.HTTP_409_CONFLICT)
+
+
 @api_view(["POST"])
 def upload(request):
     cohort_key = request.data.get("cohort_key", "default")
+    if cohort_deleting(cohort_key):
+        return _cohort_being_deleted()
     f = request.FILES.get("file")
     if not f:
         return Response({"error": "Missing file"}, status=status.HTTP_400_BAD_REQUEST)
 
-    # Save under cohort prefix; works for local filesystem or S3 via default_storage
-    stored_rel_path = default_storage.save(f"{cohort_key}/{f.name}", f)
+    # Same bytes already in this cohort: return that document instead of analysing it twice
+    sha, spooled = hash_and_spool(f, f.size)
+    with spooled:
+        existing = Document.objects.filter(cohort_key=cohort_key, content_sha256=sha).first()
+        if existing:
+            return Response({**DocumentSerializer(existing).data, "duplicate": True})
+
+        # Save under cohort prefix; works for local filesystem or S3 via default_storage
+        stored_rel_path = default_storage.save(f"{cohort_key}/{f.name}", File(spooled, name=f.name))
     stored_name = stored_rel_path.split("/")[-1]
 
-    doc = Document.objects.create(
+    # A concurrent upload of the same bytes may have won since the check above (uniq_doc_cohort_sha256)
+    doc, created = Document.objects.get_or_create(
         cohort_key=cohort_key,
-        filename=f.name,  # compatibility
-        original_filename=f.name,
-        stored_name=stored_name,
-        content_type=getattr(f, "content_type", "") or "",
-        file_path=stored_rel_path,
-        status="uploaded",
+        content_sha256=sha,
+        defaults={
+            "filename": f.name,  # compatibility
+            "original_filename": f.name,
+            "stored_name": stored_name,
+            "content_type": getattr(f, "content_type", "") or "",
+            "file_path": stored_rel_path,
+            "status": "uploaded",
+        },
     )
+    if not created:
+        default_storage.delete(stored_rel_path)
+        return Response({**DocumentSerializer(doc).data, "duplicate": True})
+    transaction.on_commit(lambda: _enqueue("extract_document", doc.id))
     return Response(DocumentSerializer(doc).data)
 
 
+@api_view(["POST"])
+def upload_archive(request):
+    cohort_key = request.data.get("cohort_key", "default")
+    if cohort_deleting(cohort_key):
+        return _cohort_being_deleted()
+    f = request.FILES.get("file")
+    if not f:
+        return Response({"error": "Missing file"}, status=status.HTTP_400_BAD_REQUEST)
+    try:
+        result = ingest_archive(cohort_key, f)
+    except ArchiveError as e:
+        return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+    doc_ids = [d.id for d in result["documents"]]
+    transaction.on_commit(lambda: [_enqueue("extract_document", i) for i in doc_ids])
+    AuditEvent.objects.create(
+        action="archive_upload",
+        cohort_key=cohort_key,
+        detail={
+            "archive": f.name,
+            "created": len(doc_ids),
+            "duplicates": len(result["duplicates"]),
+            "skipped": len(result["skipped"]),
+        },
+    )
+    return Response({
+        "documents": DocumentSerializer(result["documents"], many=True).data,
+        "duplicates": result["duplicates"],
+        "skipped": result["skipped"],
+    })
+
+
+def _list_page(request, model, serializer_class):
+    """Newest-first keyset page of a cohort's rows; the body stays a plain list, the next cursor goes in a header."""
+    qs = model.objects.filter(cohort_key=request.query_params.get("cohort_key", "default"))
+    if request.query_params.get("status"):
+        qs = qs.filter(status=request.query_params["status"])
+    qs = qs.only(*serializer_class.Meta.fields)  # never pull raw/scrubbed text or other large columns
+    try:
+        rows, next_cursor = keyset_page(
+            qs, request.query_params.get("cursor"), page_size(request.query_params.get("limit"))
+        )
+    except CursorError as e:
+        return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+    resp = Response(serializer_class(rows, many=True).data)
+    if next_cursor:
+        resp[NEXT_CURSOR_HEADER] = next_cursor
+    return resp
+
+
 @api_view(["GET"])
 def documents(request):
-    cohort_key = request.query_params.get("cohort_key", "default")
-    qs = Document.objects.filter(cohort_key=cohort_key).order_by("-created_at")
-    return Response(DocumentSerializer(qs, many=True).data)
+    return _list_page(request, Document, DocumentSerializer)
+
+
+def _bad_vector_storage() -> Response:
+    return Response(
+        {"error": f"vector_storage must be one of {', '.join(VECTOR_STORAGE_MODES)}"},
+        status=status.HTTP_400_BAD_REQUEST,
+    )
 
 
 @api_view(["POST"])
 def start_run(request):
     cohort_key = request.data.get("cohort_key", "default")
+    if cohort_deleting(cohort_key):
+        return _cohort_being_deleted()
     embedding_model = request.data.get(
         "embedding_model", "sentence-transformers/all-MiniLM-L6-v2"
     )
@@ -62,14 +166,26 @@ def start_run(request):
         "umap_params",
         {"n_neighbors": 15, "min_dist": 0.1, "metric": "cosine", "random_state": 42},
     )
+    error = umap_params_error(umap_params)
+    if error:
+        return Response({"error": error}, status=status.HTTP_400_BAD_REQUEST)
+    vector_storage = request.data.get("vector_storage", settings.VECTOR_STORAGE_DEFAULT)
+    if vector_storage not in VECTOR_STORAGE_MODES:
+        return _bad_vector_storage()
+    cluster_params = request.data.get("cluster_params", {})
+    error = cluster_params_error(cluster_params)
+    if error:
+        return Response({"error": error}, status=status.HTTP_400_BAD_REQUEST)
 
     run = AnalysisRun.objects.create(
         cohort_key=cohort_key,
         embedding_model=embedding_model,
         umap_params=umap_params,
+        cluster_params=cluster_params,
+        vector_storage=vector_storage,
         status="queued",
     )
-    run_analysis.delay(run.id)
+    _enqueue("run_analysis", run.id)
     return Response(AnalysisRunSerializer(run).data)
 
 
@@ -79,86 +195,236 @@ def run_status(request, run_id: int):
     return Response(AnalysisRunSerializer(run).data)
 
 
+def _sse(event: dict | None) -> str:
+    return ": keep-alive\n\n" if event is None else f"data: {json.dumps(event)}\n\n"
+
+
+@require_GET
+def run_events(request, run_id: int):
+    """Server-Sent Events: live progress for one run, read from Redis rather than Postgres.
+
+    The stream ends when the run finishes or after RUN_PROGRESS_STREAM_MAX_S; EventSource
+    reconnects by itself and resumes from the last event. Each open stream occupies a request
+    worker, so the web service runs gunicorn's gevent worker class (render.yaml).
+    """
+    run_state = AnalysisRun.objects.filter(id=run_id).values("status", "error").first()  # once per stream
+    if run_state is None:
+        return JsonResponse({"error": "Unknown run"}, status=404)
+    connection.close()  # don't hold a Postgres connection idle for the life of the stream
+
+    def events():
+        yield "retry: 2000\n\n"
+        for event in progress.stream(
+            run_id,
+            settings.RUN_PROGRESS_STREAM_MAX_S,
+            settings.RUN_PROGRESS_HEARTBEAT_S,
+            fallback={"run_id": run_id, "type": "run", **run_state},
+        ):
+            yield _sse(event)
+
+    resp = StreamingHttpResponse(events(), content_type="text/event-stream")
+    resp["Cache-Control"] = "no-cache"
+    resp["X-Accel-Buffering"] = "no"  # nginx: don't buffer the stream
+    return resp
+
+
 @api_view(["GET"])
+@renderer_classes([JSONRenderer, PackedProjectionRenderer])
 def projection(request, run_id: int):
     section = request.query_params.get("section", "doc")
-    pts = (
-        DocProjection.objects.filter(run_id=run_id, section=section)
-        .select_related("document")
-        .order_by("id")
-    )
-    return Response(ProjectionPointSerializer(pts, many=True).data)
+    fmt = request.accepted_renderer.format
+
+    pts = DocProjection.objects.filter(run_id=run_id, section=section).order_by("id")
+
+    # A finished run's layout never changes, but its documents' status does (re-extraction, failures),
+    # so the ETag covers those too and clients revalidate every time with If-None-Match.
+    run_status = AnalysisRun.objects.filter(id=run_id).values_list("status", flat=True).first()
+    headers = {}
+    if run_status == "done":
+        doc_state = hashlib.sha256("\n".join(pts.values_list("document__status", flat=True)).encode()).hexdigest()
+        etag = f'"run{run_id}-{section}-{fmt}-{doc_state[:16]}"'
+        headers = {"ETag": etag, "Cache-Control": "private, no-cache"}
+        # weak comparison (RFC 9110): W/"x" matches "x"
+        if_none_match = {t.removeprefix("W/") for t in parse_etags(request.headers.get("If-None-Match", ""))}
+        if "*" in if_none_match or etag in if_none_match:
+            return Response(status=status.HTTP_304_NOT_MODIFIED, headers=headers)
+
+    if fmt == PackedProjectionRenderer.format:
+        rows = list(
+            pts.values_list(
+                "document_id", "document__filename", "document__status", "x", "y", "cluster_id", "outlier_score"
+            )
+        )
+        return Response(pack_projection(rows), headers=headers)
+
+    pts = pts.select_related("document")
+    return Response(ProjectionPointSerializer(pts, many=True).data, headers=headers)
+
+
+@api_view(["GET"])
+def tile_index(request, run_id: int):
+    section = request.query_params.get("section", "doc")
+    index = ProjectionTileIndex.objects.filter(run_id=run_id, section=section).first()
+    if index is None:
+        return Response({"error": "No tiles for this run/section"}, status=status.HTTP_404_NOT_FOUND)
+    return Response({
+        "section": section,
+        "min_x": index.min_x,
+        "min_y": index.min_y,
+        "extent": index.extent,
+        "max_zoom": index.max_zoom,
+        "tile_capacity": index.tile_capacity,
+    })
+
+
+@api_view(["GET"])
+def tile(request, run_id: int, zoom: int, x: int, y: int):
+    section = request.query_params.get("section", "doc")
+    index = ProjectionTileIndex.objects.filter(run_id=run_id, section=section).first()
+    if index is None:
+        return Response({"error": "No tiles for this run/section"}, status=status.HTTP_404_NOT_FOUND)
+    if zoom > index.max_zoom + TILE_MAX_OVERZOOM:  # checked before the shift: 1 << zoom is unbounded
+        return Response({"error": "Zoom out of range"}, status=status.HTTP_400_BAD_REQUEST)
+    if not (0 <= x < (1 << zoom) and 0 <= y < (1 << zoom)):
+        return Response({"error": "Tile out of range"}, status=status.HTTP_400_BAD_REQUEST)
+    # Tiles are written while the run is still going (and again on a stage retry); only a finished run's are final.
+    run_status = AnalysisRun.objects.filter(id=run_id).values_list("status", flat=True).first()
+    cache = "private, max-age=3600" if run_status == "done" else "no-cache"
+    return Response(tile_points(index, zoom, x, y), headers={"Cache-Control": cache})
+
+
+def _neighbor_k(request) -> int | None:
+    """?k= clamped to NEIGHBOR_K_MAX; None if it isn't a positive integer."""
+    try:
+        k = int(request.query_params.get("k", 5))
+    except ValueError:
+        return None
+    return min(k, settings.NEIGHBOR_K_MAX) if k >= 1 else None
+
+
+def _bad_k() -> Response:
+    return Response({"error": "k must be a positive integer"}, status=status.HTTP_400_BAD_REQUEST)
 
 
 @api_view(["GET"])
 def doc_detail(request, run_id: int, doc_id: int):
     section = request.query_params.get("section", "doc")
-    k = int(request.query_params.get("k", 5))
-    nn = nearest_documents(run_id=run_id, doc_id=doc_id, section=section, k=k)
+    k = _neighbor_k(request)
+    if k is None:
+        return _bad_k()
+    nn = graph_neighbors(run_id=run_id, doc_id=doc_id, section=section, k=k)
+    if nn is None:  # no graph for this run/section, or k beyond what was precomputed
+        nn = nearest_documents(run_id=run_id, doc_id=doc_id, section=section, k=k)
     return Response({"doc_id": doc_id, "section": section, "neighbors": nn})
 
 
+@api_view(["GET"])
+def neighbors(request, run_id: int):
+    section = request.query_params.get("section", "doc")
+    k = _neighbor_k(request)
+    if k is None:
+        return _bad_k()
+    try:
+        doc_ids = [int(x) for x in request.query_params.get("doc_ids", "").split(",") if x.strip()]
+    except ValueError:
+        return Response({"error": "doc_ids must be comma-separated integers"}, status=status.HTTP_400_BAD_REQUEST)
+    if len(doc_ids) > settings.NEIGHBOR_BATCH_MAX:
+        return Response(
+            {"error": f"At most {settings.NEIGHBOR_BATCH_MAX} doc_ids per request"},
+            status=status.HTTP_400_BAD_REQUEST,
+        )
+    nn = nearest_documents_batch(run_id=run_id, doc_ids=doc_ids, section=section, k=k)
+    return Response({"section": section, "k": k, "neighbors": {str(d): v for d, v in nn.items()}})
+
+
 @api_view(["GET"])
 def herd(request, run_id: int):
     run = AnalysisRun.objects.get(id=run_id)
     return Response(run.herd_phrases or {})
 
 
+@api_view(["POST"])
+def recluster(request, run_id: int):
+    # Preview only: re-cuts the stored tree; persist a choice with rerun + cluster_params.
+    section = request.data.get("section", "doc")
+    method = request.data.get("cluster_selection_method", "eom")
+    try:
+        min_cluster_size = int(request.data.get("min_cluster_size"))
+    except (TypeError, ValueError):
+        return Response({"error": "min_cluster_size must be an integer"}, status=status.HTTP_400_BAD_REQUEST)
+    if min_cluster_size < 2 or method not in {"eom", "leaf"}:
+        return Response(
+            {"error": "min_cluster_size must be >= 2 and cluster_selection_method 'eom' or 'leaf'"},
+            status=status.HTTP_400_BAD_REQUEST,
+        )
+
+    result = recluster_from_tree(run_id, section, min_cluster_size, method)
+    if result is None:
+        return Response({"error": "No cluster tree for this run/section"}, status=status.HTTP_404_NOT_FOUND)
+    return Response({"section": section, **result})
+
+
 @api_view(["DELETE"])
 def delete_cohort(request, cohort_key: str):
-    actor = request.META.get("REMOTE_ADDR", "")
-
-    docs = Document.objects.filter(cohort_key=cohort_key)
-    n_docs = docs.count()
-
-    # Delete stored files via default_storage (works for local or S3)
-    for d in docs.only("file_path"):
-        if d.file_path:
-            try:
-                default_storage.delete(d.file_path)
-            except Exception:
-                # Keep going; DB deletion still proceeds
-                pass
-
-    with transaction.atomic():
-        docs.delete()
-        AnalysisRun.objects.filter(cohort_key=cohort_key).delete()
-        AuditEvent.objects.create(
-            action="cohort_delete",
-            cohort_key=cohort_key,
-            actor=actor,
-            detail={"documents_deleted": n_docs},
-        )
+    # Files and rows go in a background job; poll deletion_status with the returned id.
+    job = active_deletion_job(cohort_key)
+    if job is not None:
+        return Response(DeletionJobSerializer(job).data, status=status.HTTP_202_ACCEPTED)
+    job = DeletionJob.objects.create(cohort_key=cohort_key, actor=request.META.get("REMOTE_ADDR", ""))
+    transaction.on_commit(lambda: _enqueue("delete_cohort", job.id))
+    return Response(DeletionJobSerializer(job).data, status=status.HTTP_202_ACCEPTED)
+
 
-    return Response({"cohort_key": cohort_key, "documents_deleted": n_docs})
+@api_view(["GET"])
+def deletion_status(request, job_id: int):
+    job = DeletionJob.objects.filter(id=job_id).first()
+    if job is None:
+        return Response({"error": "Unknown deletion job"}, status=status.HTTP_404_NOT_FOUND)
+    return Response(DeletionJobSerializer(job).data)
 
 
 @api_view(["GET"])
 def list_runs(request):
-    cohort_key = request.query_params.get("cohort_key", "default")
-    qs = AnalysisRun.objects.filter(cohort_key=cohort_key).order_by("-created_at")
-    return Response(AnalysisRunSerializer(qs, many=True).data)
+    return _list_page(request, AnalysisRun, AnalysisRunSerializer)
 
 
 @api_view(["POST"])
 def rerun(request, run_id: int):
     base = AnalysisRun.objects.get(id=run_id)
+    if cohort_deleting(base.cohort_key):
+        return _cohort_being_deleted()
     umap_params = request.data.get("umap_params", base.umap_params)
+    cluster_params = request.data.get("cluster_params", base.cluster_params)
     label = request.data.get("label", f"rerun of {run_id}")
+    mode = request.data.get("mode", "full")
+    if mode not in {"full", "incremental"}:
+        return Response({"error": "mode must be 'full' or 'incremental'"}, status=status.HTTP_400_BAD_REQUEST)
+    error = umap_params_error(umap_params)
+    if error:
+        return Response({"error": error}, status=status.HTTP_400_BAD_REQUEST)
+    vector_storage = request.data.get("vector_storage", base.vector_storage)
+    if vector_storage not in VECTOR_STORAGE_MODES:
+        return _bad_vector_storage()
+    error = cluster_params_error(cluster_params)
+    if error:
+        return Response({"error": error}, status=status.HTTP_400_BAD_REQUEST)
 
     run = AnalysisRun.objects.create(
         cohort_key=base.cohort_key,
         embedding_model=base.embedding_model,
         chunking_version=base.chunking_version,
         umap_params=umap_params,
+        cluster_params=cluster_params,
         parent_run=base,
         label=label,
+        mode=mode,
+        vector_storage=vector_storage,
         status="queued",
     )
     AuditEvent.objects.create(
         action="run_rerun",
         cohort_key=run.cohort_key,
-        detail={"base_run_id": base.id, "new_run_id": run.id, "umap_params": umap_params},
+        detail={"base_run_id": base.id, "new_run_id": run.id, "umap_params": umap_params, "mode": mode},
     )
-    run_analysis.delay(run.id)
+    _enqueue("run_analysis", run.id)
     return Response(AnalysisRunSerializer(run).data)
\ No newline at end of file
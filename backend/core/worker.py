@@ -0,0 +1,94 @@
+# backend/core/worker.py
+"""Celery worker hooks.
+
+Embedding models in EMBED_PRELOAD_MODELS are loaded in the parent process
+before the prefork pool starts, so every child shares the same weight pages
+copy-on-write instead of loading its own copy on its first run. Each child
+then runs one tiny encode at start so the first real batch is not slower.
+
+Stage profiles can be exported as Prometheus metrics when prometheus_client is
+installed and PROMETHEUS_METRICS_PORT is set. Prefork children each record
+their own samples; set PROMETHEUS_MULTIPROC_DIR so the parent's endpoint
+aggregates them.
+"""
+from __future__ import annotations
+
+import os
+
+from celery.signals import worker_init, worker_process_init
+from celery.utils.log import get_logger
+from django.conf import settings
+
+from core import embed
+
+try:
+    import prometheus_client
+except ImportError:  # optional
+    prometheus_client = None
+
+logger = get_logger(__name__)
+
+_METRICS: dict = {}
+
+
+def _metrics() -> dict:
+    if not _METRICS and prometheus_client is not None:
+        labels = ["stage", "section", "step"]
+        _METRICS.update(
+            wall=prometheus_client.Histogram(
+                "cohortmap_stage_wall_seconds", "Wall time per pipeline step", labels,
+                buckets=(0.1, 0.5, 1, 5, 15, 30, 60, 120, 300, 600, 1800),
+            ),
+            cpu=prometheus_client.Counter("cohortmap_stage_cpu_seconds", "CPU time per pipeline step", labels),
+            items=prometheus_client.Counter("cohortmap_stage_items", "Items processed per pipeline step", labels),
+            rss=prometheus_client.Gauge(
+                "cohortmap_stage_peak_rss_bytes", "Peak RSS during the last run of a step", labels,
+                multiprocess_mode="max",
+            ),
+        )
+    return _METRICS
+
+
+def observe_profile(stage: str, prof: dict) -> None:
+    """Export one stage's profile (see core/profiling.stage); a no-op without prometheus_client."""
+    metrics = _metrics()
+    if not metrics:
+        return
+    name, _, section = stage.partition(":")
+    for step, rec in prof.items():
+        lv = (name, section, step)
+        metrics["wall"].labels(*lv).observe(rec.get("seconds", 0.0))
+        metrics["cpu"].labels(*lv).inc(rec.get("cpu_s", 0.0))
+        metrics["items"].labels(*lv).inc(rec.get("items", 0))
+        metrics["rss"].labels(*lv).set(rec.get("rss_peak_mb", 0.0) * 2**20)
+
+
+@worker_init.connect
+def start_metrics_server(**kwargs):
+    port = settings.PROMETHEUS_METRICS_PORT
+    if not port or prometheus_client is None:
+        return
+    registry = prometheus_client.REGISTRY
+    if os.environ.get("PROMETHEUS_MULTIPROC_DIR"):
+        from prometheus_client import multiprocess
+
+        registry = prometheus_client.CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    prometheus_client.start_http_server(port, registry=registry)
+
+
+@worker_init.connect
+def preload_embedding_models(**kwargs):
+    embed.set_model_cache_size(settings.EMBED_MODEL_CACHE_SIZE)
+    try:
+        embed.preload_models(settings.EMBED_PRELOAD_MODELS)
+    except Exception:  # a model that can't load fails its runs, not the worker
+        logger.exception("Embedding model preload failed")
+
+
+@worker_process_init.connect
+def warm_up_embedding_models(**kwargs):
+    try:
+        embed.warm_up(settings.EMBED_PRELOAD_MODELS)
+    except Exception:
+        logger.exception("Embedding model warm-up failed")
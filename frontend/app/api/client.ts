@@ -9,17 +9,38 @@ export async function uploadFile(file: File, cohortKey: string) {
   return res.json();
 }
 
-export async function listDocs(cohortKey: string) {
-  const res = await fetch(`${API_BASE}/api/documents/?cohort_key=${encodeURIComponent(cohortKey)}`);
+// zip or tar of resumes; files already in the cohort (same bytes) come back under `duplicates`
+export async function uploadArchive(file: File, cohortKey: string) {
+  const fd = new FormData();
+  fd.append("file", file);
+  fd.append("cohort_key", cohortKey);
+  const res = await fetch(`${API_BASE}/api/upload/archive/`, { method: "POST", body: fd });
   if (!res.ok) throw new Error(await res.text());
   return res.json();
 }
 
-export async function startRun(cohortKey: string) {
+export type Page<T = any> = { rows: T[]; nextCursor: string | null };
+
+// List endpoints return one page per call and the next page's cursor in X-Next-Cursor;
+// pass that back as `cursor` to load the following page (nextCursor null: no more).
+async function fetchPage(url: string, cursor?: string | null): Promise<Page> {
+  const res = await fetch(cursor ? `${url}&cursor=${encodeURIComponent(cursor)}` : url);
+  if (!res.ok) throw new Error(await res.text());
+  return { rows: await res.json(), nextCursor: res.headers.get("X-Next-Cursor") };
+}
+
+export async function listDocs(cohortKey: string, status?: string, cursor?: string | null) {
+  const statusParam = status ? `&status=${encodeURIComponent(status)}` : "";
+  return fetchPage(`${API_BASE}/api/documents/?cohort_key=${encodeURIComponent(cohortKey)}${statusParam}`, cursor);
+}
+
+export type VectorStorage = "float32" | "halfvec" | "int8";
+
+export async function startRun(cohortKey: string, vectorStorage?: VectorStorage) {
   const res = await fetch(`${API_BASE}/api/runs/start/`, {
     method: "POST",
     headers: { "Content-Type": "application/json" },
-    body: JSON.stringify({ cohort_key: cohortKey })
+    body: JSON.stringify({ cohort_key: cohortKey, vector_storage: vectorStorage })
   });
   if (!res.ok) throw new Error(await res.text());
   return res.json();
@@ -31,12 +52,136 @@ export async function getRun(runId: number) {
   return res.json();
 }
 
+export type RunProgressEvent = {
+  run_id: number;
+  type: "run" | "stage";
+  status: string;
+  stage?: string;
+  section?: string | null;
+  done?: number;
+  total?: number;
+  error?: string;
+};
+
+const isFinal = (e: RunProgressEvent) => e.type === "run" && (e.status === "done" || e.status === "failed");
+
+// Live run progress over Server-Sent Events; returns a function that closes the stream.
+// Falls back to polling runs/<id>/ (status only) when SSE is unavailable or keeps failing.
+export function subscribeRunProgress(
+  runId: number,
+  onEvent: (e: RunProgressEvent) => void,
+  pollMs = 1500,
+  maxSseErrors = 3
+) {
+  let closed = false;
+  let timer: ReturnType<typeof setTimeout> | null = null;
+  let source: EventSource | null = null;
+
+  async function poll() {
+    if (closed) return;
+    try {
+      const run = await getRun(runId);
+      if (closed) return;
+      const event: RunProgressEvent = { run_id: runId, type: "run", status: run.status, error: run.error };
+      onEvent(event);
+      if (isFinal(event)) return;
+    } catch {
+      // keep polling; the next attempt may succeed
+    }
+    timer = setTimeout(poll, pollMs);
+  }
+
+  if (typeof EventSource === "undefined") {
+    poll();
+  } else {
+    let errors = 0;
+    source = new EventSource(`${API_BASE}/api/runs/${runId}/events/`);
+    source.onmessage = (msg) => {
+      errors = 0;
+      const event: RunProgressEvent = JSON.parse(msg.data);
+      onEvent(event);
+      if (isFinal(event)) source?.close();
+    };
+    source.onerror = () => {
+      // EventSource reconnects by itself; give up once it stops trying or keeps failing
+      errors += 1;
+      if (source && (source.readyState === EventSource.CLOSED || errors >= maxSseErrors)) {
+        source.close();
+        source = null;
+        poll();
+      }
+    };
+  }
+
+  return () => {
+    closed = true;
+    source?.close();
+    if (timer) clearTimeout(timer);
+  };
+}
+
 export async function getProjection(runId: number, section: "doc" | "skills" | "experience" = "doc") {
   const res = await fetch(`${API_BASE}/api/runs/${runId}/projection/?section=${encodeURIComponent(section)}`);
   if (!res.ok) throw new Error(await res.text());
   return res.json();
 }
 
+export type PackedProjection = {
+  n: number;
+  columns: Record<string, Int32Array | Float32Array | BigInt64Array>;
+  filenames: string[];
+  statuses: string[];
+};
+
+const PACKED_ARRAYS = { int32: Int32Array, int64: BigInt64Array, float32: Float32Array } as const;
+
+// Decodes the `?format=packed` projection buffer (see backend/core/packing.py).
+export function decodePackedProjection(buf: ArrayBuffer): PackedProjection {
+  const view = new DataView(buf);
+  const magic = new TextDecoder().decode(new Uint8Array(buf, 0, 4));
+  if (magic !== "CSMP") throw new Error("Not a packed projection");
+  const headerLen = view.getUint32(4, true);
+  const header = JSON.parse(new TextDecoder().decode(new Uint8Array(buf, 8, headerLen)));
+
+  let offset = 8 + headerLen;
+  const columns: PackedProjection["columns"] = {};
+  for (const col of header.columns as { name: string; dtype: keyof typeof PACKED_ARRAYS }[]) {
+    const Ctor = PACKED_ARRAYS[col.dtype];
+    columns[col.name] = new Ctor(buf, offset, header.n);
+    offset += header.n * Ctor.BYTES_PER_ELEMENT;
+  }
+  return { n: header.n, columns, filenames: header.filenames, statuses: header.statuses };
+}
+
+export async function getProjectionPacked(runId: number, section: "doc" | "skills" | "experience" = "doc") {
+  const res = await fetch(
+    `${API_BASE}/api/runs/${runId}/projection/?format=packed&section=${encodeURIComponent(section)}`
+  );
+  if (!res.ok) throw new Error(await res.text());
+  return decodePackedProjection(await res.arrayBuffer());
+}
+
+export async function getTileIndex(runId: number, section: "doc" | "skills" | "experience" = "doc") {
+  const res = await fetch(`${API_BASE}/api/runs/${runId}/tiles/?section=${encodeURIComponent(section)}`);
+  if (!res.ok) throw new Error(await res.text());
+  return res.json();
+}
+
+// Tile points are [document_id, x, y, cluster_id, weight]; weight > 1 stands in for a dense cell.
+export async function getTile(
+  runId: number,
+  z: number,
+  x: number,
+  y: number,
+  section: "doc" | "skills" | "experience" = "doc"
+) {
+  const res = await fetch(
+    `${API_BASE}/api/runs/${runId}/tiles/${z}/${x}/${y}/?section=${encodeURIComponent(section)}`
+  );
+  if (!res.ok) throw new Error(await res.text());
+  return res.json();
+}
+
 export async function getDocDetail(
   runId: number,
   docId: number,
@@ -50,31 +195,78 @@ export async function getDocDetail(
   return res.json();
 }
 
+export async function getNeighborsBatch(
+  runId: number,
+  docIds: number[],
+  section: "doc" | "skills" | "experience" = "doc",
+  k: number = 5
+) {
+  const ids = docIds.join(",");
+  const res = await fetch(
+    `${API_BASE}/api/runs/${runId}/neighbors/?doc_ids=${ids}&k=${k}&section=${encodeURIComponent(section)}`
+  );
+  if (!res.ok) throw new Error(await res.text());
+  return res.json();
+}
+
 export async function getHerd(runId: number) {
   const res = await fetch(`${API_BASE}/api/runs/${runId}/herd/`);
   if (!res.ok) throw new Error(await res.text());
   return res.json();
 }
 
-export async function deleteCohort(cohortKey: string) {
+export async function getDeletionJob(jobId: number) {
+  const res = await fetch(`${API_BASE}/api/deletions/${jobId}/`);
+  if (!res.ok) throw new Error(await res.text());
+  return res.json();
+}
+
+// Deletion runs in the background; resolves once the job is done, throws if it failed.
+export async function deleteCohort(cohortKey: string, pollMs = 1000) {
   const res = await fetch(`${API_BASE}/api/cohorts/${encodeURIComponent(cohortKey)}/`, {
     method: "DELETE",
   });
   if (!res.ok) throw new Error(await res.text());
-  return res.json();
+  let job = await res.json();
+  while (job.status !== "done" && job.status !== "failed") {
+    await new Promise((r) => setTimeout(r, pollMs));
+    job = await getDeletionJob(job.id);
+  }
+  if (job.status === "failed") throw new Error(job.error || "Cohort deletion failed");
+  return job;
 }
 
-export async function listRuns(cohortKey: string) {
-  const res = await fetch(`${API_BASE}/api/runs/?cohort_key=${encodeURIComponent(cohortKey)}`);
+export async function listRuns(cohortKey: string, cursor?: string | null) {
+  return fetchPage(`${API_BASE}/api/runs/?cohort_key=${encodeURIComponent(cohortKey)}`, cursor);
+}
+
+export async function rerun(
+  runId: number,
+  umapParams: { n_neighbors: number; min_dist: number },
+  label?: string,
+  mode: "full" | "incremental" = "full",
+  clusterParams?: { min_cluster_size?: number; min_samples?: number }
+) {
+  const res = await fetch(`${API_BASE}/api/runs/${runId}/rerun/`, {
+    method: "POST",
+    headers: { "Content-Type": "application/json" },
+    body: JSON.stringify({ umap_params: umapParams, cluster_params: clusterParams, label, mode }),
+  });
   if (!res.ok) throw new Error(await res.text());
   return res.json();
 }
 
-export async function rerun(runId: number, umapParams: { n_neighbors: number; min_dist: number }, label?: string) {
-  const res = await fetch(`${API_BASE}/api/runs/${runId}/rerun/`, {
+// Preview: re-cuts the run's stored cluster tree, nothing is saved.
+export async function recluster(
+  runId: number,
+  minClusterSize: number,
+  section: "doc" | "skills" | "experience" = "doc",
+  method: "eom" | "leaf" = "eom"
+) {
+  const res = await fetch(`${API_BASE}/api/runs/${runId}/recluster/`, {
     method: "POST",
     headers: { "Content-Type": "application/json" },
-    body: JSON.stringify({ umap_params: umapParams, label }),
+    body: JSON.stringify({ section, min_cluster_size: minClusterSize, cluster_selection_method: method }),
   });
   if (!res.ok) throw new Error(await res.text());
   return res.json();
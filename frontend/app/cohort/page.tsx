@@ -5,6 +5,7 @@ import {
   listDocs,
   startRun,
   getRun,
+  subscribeRunProgress,
   getProjection,
   getHerd,
   deleteCohort,
@@ -24,7 +25,9 @@ type RightTab = "details" | "herd";
 export default function CohortPage() {
   const [cohortKey, setCohortKey] = useState("default");
   const [docs, setDocs] = useState<any[]>([]);
+  const [docsCursor, setDocsCursor] = useState<string | null>(null);
   const [run, setRun] = useState<any>(null);
+  const [runProgress, setRunProgress] = useState<string | null>(null);
   const [points, setPoints] = useState<any[]>([]);
   const [selected, setSelected] = useState<number | null>(null);
 
@@ -40,6 +43,7 @@ export default function CohortPage() {
 
   // Runs UI state
   const [runs, setRuns] = useState<any[]>([]);
+  const [runsCursor, setRunsCursor] = useState<string | null>(null);
   const [runsError, setRunsError] = useState<string | null>(null);
   const [runsLoading, setRunsLoading] = useState(false);
 
@@ -74,21 +78,50 @@ export default function CohortPage() {
     return { created, nn, md, model };
   }
 
+  // Lists load one page; "Load more" follows the server's cursor instead of fetching everything up front.
   async function refreshDocs() {
     try {
-      const d = await listDocs(cohortKey);
-      setDocs(d);
+      const page = await listDocs(cohortKey);
+      setDocs(page.rows);
+      setDocsCursor(page.nextCursor);
     } catch (e: any) {
       console.error("Failed to refresh docs:", e);
     }
   }
 
+  async function loadMoreDocs() {
+    if (!docsCursor) return;
+    try {
+      const page = await listDocs(cohortKey, undefined, docsCursor);
+      setDocs((d) => [...d, ...page.rows]);
+      setDocsCursor(page.nextCursor);
+    } catch (e: any) {
+      console.error("Failed to load more docs:", e);
+    }
+  }
+
   async function refreshRuns() {
     setRunsLoading(true);
     setRunsError(null);
     try {
-      const rs = await listRuns(cohortKey);
-      setRuns(rs);
+      const page = await listRuns(cohortKey);
+      setRuns(page.rows);
+      setRunsCursor(page.nextCursor);
+    } catch (e: any) {
+      setRunsError(e?.message ?? "Failed to load runs");
+    } finally {
+      setRunsLoading(false);
+    }
+  }
+
+  async function loadMoreRuns() {
+    if (!runsCursor) return;
+    setRunsLoading(true);
+    setRunsError(null);
+    try {
+      const page = await listRuns(cohortKey, runsCursor);
+      setRuns((rs) => [...rs, ...page.rows]);
+      setRunsCursor(page.nextCursor);
     } catch (e: any) {
       setRunsError(e?.message ?? "Failed to load runs");
     } finally {
@@ -107,7 +140,9 @@ export default function CohortPage() {
 
       // Clear all UI state tied to the cohort
       setDocs([]);
+      setDocsCursor(null);
       setRuns([]);
+      setRunsCursor(null);
       setRun(null);
       setPoints([]);
       setSelected(null);
@@ -206,44 +241,43 @@ export default function CohortPage() {
     }
   }
 
-  // Poll run status while running; when done, fetch projection for current view.
+  // Follow run progress over SSE while running; when it ends, fetch the run and its projection once.
   useEffect(() => {
     if (!run?.id) return;
+    if (run.status === "done" || run.status === "failed") return;
 
-    let timer: any = null;
     let cancelled = false;
 
-    async function poll() {
-      if (cancelled) return;
-
+    async function finish() {
       const r2 = await getRun(run.id);
       if (cancelled) return;
-
       setRun(r2);
-
-      if (r2.status === "done") {
-        const p = await getProjection(run.id, view);
-        if (!cancelled) {
-          setPoints(p);
-          setSelected(null);
-        }
-        return;
+      setRunProgress(null);
+      if (r2.status !== "done") return;
+      const p = await getProjection(run.id, view);
+      if (!cancelled) {
+        setPoints(p);
+        setSelected(null);
       }
-
-      if (r2.status === "failed") return;
-
-      timer = setTimeout(poll, 1500);
     }
 
-    if (run.status !== "done" && run.status !== "failed") {
-      poll();
-    }
+    const close = subscribeRunProgress(run.id, (e) => {
+      if (cancelled) return;
+      if (e.type === "run") {
+        if (e.status === "done" || e.status === "failed") finish();
+        else setRun((r: any) => ({ ...r, status: e.status }));
+        return;
+      }
+      const name = e.section ? `${e.stage}:${e.section}` : e.stage;
+      const counts = e.total ? ` ${e.done ?? 0}/${e.total}` : "";
+      setRunProgress(`${name} ${e.status}${counts}`);
+    });
 
     return () => {
       cancelled = true;
-      if (timer) clearTimeout(timer);
+      close();
     };
-    // NOTE: don't include `view` here, or polling restarts on view change
+    // NOTE: don't include `view` here, or the stream restarts on view change
   }, [run?.id]);
 
   // If view changes and the run is already done, refetch projection for that section.
@@ -390,6 +424,18 @@ export default function CohortPage() {
                 Refresh docs
               </Button>
 
+              {docsCursor ? (
+                <Button onClick={loadMoreDocs} variant="ghost">
+                  Load more docs
+                </Button>
+              ) : null}
+
+              {runsCursor ? (
+                <Button onClick={loadMoreRuns} variant="ghost" disabled={runsLoading}>
+                  Load more runs
+                </Button>
+              ) : null}
+
               <Button onClick={kickRun} disabled={docs.length === 0}>
                 Start analysis
               </Button>
@@ -446,7 +492,7 @@ export default function CohortPage() {
             </div>
             <div className="text-xs text-neutral-400">
               {run.status === "running"
-                ? "Processing…"
+                ? runProgress ?? "Processing…"
                 : run.status === "queued"
                 ? "Queued…"
                 : run.status === "done"
@@ -473,7 +519,7 @@ export default function CohortPage() {
               title="Projection"
               right={
                 <span className="text-xs text-neutral-400">
-                  Docs: <span className="text-neutral-200">{docs.length}</span>
+                  Docs: <span className="text-neutral-200">{docs.length}{docsCursor ? "+" : ""}</span>
                   {run ? (
                     <>
                       {" "}